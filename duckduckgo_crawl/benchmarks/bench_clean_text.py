@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression snapshots for the text-cleaning path
+
+Runs clean_text over the corpus in benchmarks/corpus plus a generated
+~1 MB pathological page, reports throughput and per-filter hit counts and
+timings, and compares the cleaned output against benchmarks/snapshots.
+
+Usage (from duckduckgo_crawl/):
+    python benchmarks/bench_clean_text.py
+    python benchmarks/bench_clean_text.py --update-snapshots
+    python benchmarks/bench_clean_text.py --output before.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import text_cleaner
+from text_cleaner import clean_text, classify_line
+
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+SNAPSHOT_DIR = os.path.join(BENCH_DIR, 'snapshots')
+
+# Cleaned output larger than this is snapshotted as a digest instead of text
+MAX_TEXT_SNAPSHOT = 64 * 1024
+
+FILTERS = [
+    ('advertisement', text_cleaner.is_advertisement_content),
+    ('ui', text_cleaner.is_ui_element),
+    ('navigation', text_cleaner.is_navigation_content),
+    ('boilerplate', text_cleaner.is_boilerplate_content),
+    ('social_media', text_cleaner.is_social_media_content),
+    ('technical', text_cleaner.is_technical_content)
+]
+
+NEUTRAL_WORDS = (
+    "the harbour council winter rainfall farmers village bridge river morning "
+    "families teachers doctors reported measured thousand percent growth slowly "
+    "quietly across between during after before because although several ancient"
+).split()
+
+
+def build_pathological_page(typical: str, target_bytes: int = 1024 * 1024) -> str:
+    """Generate a deterministic ~1 MB page mixing the worst cases for the cleaner"""
+    rng = random.Random(1234)
+    parts: List[str] = []
+    size = 0
+    while size < target_bytes:
+        kind = rng.randrange(4)
+        if kind == 0:
+            # Whole real pages, as when a site inlines several articles
+            part = typical
+        elif kind == 1:
+            # Very long lines with no filter keyword force a full scan
+            part = ' '.join(rng.choice(NEUTRAL_WORDS) for _ in range(rng.randint(300, 1200)))
+        elif kind == 2:
+            # Short keyword-dense UI lines
+            part = '\n'.join(rng.choice(['Share on Facebook', 'Read more about this', 'Sign up now for free',
+                                         'Cookie settings here', 'Page 3 of 12', 'Follow us on Instagram'])
+                             for _ in range(50))
+        else:
+            # Punctuation, numbers, dates and URLs
+            part = '\n'.join(rng.choice(['----------------', '12/05/2024', '10:30 PM', '+4420794600',
+                                         'https://example.com/a/b', '*** | *** | ***', 'user@example.com'])
+                             for _ in range(50))
+        parts.append(part)
+        size += len(part) + 1
+    return '\n'.join(parts)
+
+
+def load_corpus() -> Dict[str, str]:
+    """Read every checked-in page and add the generated pathological one"""
+    pages = {}
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        if filename.endswith('.md'):
+            with open(os.path.join(CORPUS_DIR, filename), encoding='utf-8') as f:
+                pages[filename[:-3]] = f.read()
+    pages['pathological'] = build_pathological_page(pages.get('typical', ''))
+    return pages
+
+
+def time_call(func, repeat: int) -> float:
+    """Best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_page(text: str, repeat: int) -> Dict:
+    """Measure clean_text throughput and per-filter cost on one page"""
+    lines = text.split('\n')
+    candidates = [line.strip() for line in lines if line.strip()]
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+
+    elapsed = time_call(lambda: clean_text(text), repeat)
+    stats: Dict[str, int] = {}
+    cleaned = clean_text(text, stats)
+
+    filters = {}
+    for name, func in FILTERS:
+        filter_time = time_call(lambda: [func(line) for line in candidates], repeat)
+        filters[name] = {
+            'hits': sum(1 for line in candidates if func(line)),
+            'seconds': filter_time
+        }
+    classify_time = time_call(lambda: [classify_line(line) for line in candidates], repeat)
+
+    return {
+        'bytes': len(text.encode('utf-8')),
+        'lines': len(lines),
+        'kept_lines': cleaned.count('\n') + 1 if cleaned else 0,
+        'seconds': elapsed,
+        'lines_per_sec': len(lines) / elapsed if elapsed else 0.0,
+        'mb_per_sec': size_mb / elapsed if elapsed else 0.0,
+        'rejections': stats,
+        'filters': filters,
+        'classify_seconds': classify_time,
+        'cleaned': cleaned
+    }
+
+
+def snapshot_path(name: str, cleaned: str) -> str:
+    suffix = '.sha256' if len(cleaned) > MAX_TEXT_SNAPSHOT else '.txt'
+    return os.path.join(SNAPSHOT_DIR, name + suffix)
+
+
+def snapshot_body(path: str, cleaned: str) -> str:
+    if path.endswith('.sha256'):
+        return hashlib.sha256(cleaned.encode('utf-8')).hexdigest() + '\n'
+    return cleaned + '\n'
+
+
+def check_snapshot(name: str, cleaned: str, update: bool) -> str:
+    """Compare cleaned output with its snapshot, or rewrite the snapshot"""
+    path = snapshot_path(name, cleaned)
+    body = snapshot_body(path, cleaned)
+    if update:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        return 'updated'
+    if not os.path.exists(path):
+        return 'missing'
+    with open(path, encoding='utf-8') as f:
+        return 'ok' if f.read() == body else 'CHANGED'
+
+
+def print_report(results: Dict[str, Dict]):
+    print(f"{'page':<14}{'size':>10}{'lines':>9}{'kept':>8}{'ms':>10}{'lines/s':>12}{'MB/s':>8}  snapshot")
+    for name, result in results.items():
+        print(f"{name:<14}{result['bytes']:>10}{result['lines']:>9}{result['kept_lines']:>8}"
+              f"{result['seconds'] * 1000:>10.2f}{result['lines_per_sec']:>12.0f}{result['mb_per_sec']:>8.2f}"
+              f"  {result['snapshot']}")
+
+    print()
+    print(f"{'filter':<16}" + ''.join(f"{name:>24}" for name in results))
+    for filter_name, _ in FILTERS:
+        cells = ''.join(
+            f"{result['filters'][filter_name]['hits']:>10} hits {result['filters'][filter_name]['seconds'] * 1000:>7.2f} ms"
+            for result in results.values()
+        )
+        print(f"{filter_name:<16}{cells}")
+    print(f"{'classify_line':<16}" + ''.join(
+        f"{'':>15}{result['classify_seconds'] * 1000:>6.2f} ms" for result in results.values()
+    ))
+
+    print()
+    for name, result in results.items():
+        reasons = ', '.join(f"{reason}={count}" for reason, count in sorted(result['rejections'].items()))
+        print(f"{name} rejections: {reasons}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text over the saved corpus")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement (best is reported)")
+    parser.add_argument('--update-snapshots', action='store_true', help="rewrite the cleaned-output snapshots")
+    parser.add_argument('--output', help="write the numbers as JSON for before/after comparisons")
+    args = parser.parse_args()
+
+    results = {}
+    for name, text in load_corpus().items():
+        result = bench_page(text, args.repeat)
+        result['snapshot'] = check_snapshot(name, result.pop('cleaned'), args.update_snapshots)
+        results[name] = result
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if any(result['snapshot'] in ('CHANGED', 'missing') for result in results.values()):
+        print("\nCleaned output differs from the snapshots; rerun with --update-snapshots if intended")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Pool of warm headless browsers shared across extract_markdown calls
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from crawl4ai import AsyncWebCrawler
+from crawl4ai.async_configs import BrowserConfig
+from crawler import build_browser_config
+
+
+class _PooledCrawler:
+    """One browser slot in the pool"""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self.pages = 0
+        self.failures = 0
+        # Cleared by crawl() when the current lease's crawl came back unsuccessful
+        self.succeeded = True
+
+
+class CrawlerPool:
+    """Keeps N AsyncWebCrawler instances alive and leases them out one crawl at a time
+
+    Browsers are launched lazily (or up front with start()), recycled after
+    max_pages crawls, max_failures consecutive failed crawls or when found
+    disconnected on lease, and closed on close(). A pool belongs to the event loop that first uses it, as its
+    browsers do; close it before using it from another loop.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 50, max_failures: int = 3,
+                 browser_config: Optional[BrowserConfig] = None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_failures = max_failures
+        self.browser_config = browser_config
+        self.stats: Dict[str, int] = {'leases': 0, 'launched': 0, 'recycled': 0}
+        self._slots: List[_PooledCrawler] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_slots(self):
+        loop = asyncio.get_running_loop()
+        if self._idle is not None and self._loop is not loop:
+            raise RuntimeError("CrawlerPool is in use on another event loop; close() it there before reusing it")
+        if self._idle is None:
+            self._loop = loop
+            self._idle = asyncio.Queue()
+            self._slots = [_PooledCrawler(i) for i in range(self.size)]
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+
+    async def _launch(self, slot: _PooledCrawler):
+        crawler = AsyncWebCrawler(browser_config=self.browser_config or build_browser_config())
+        try:
+            await crawler.start()
+        except BaseException:
+            # Don't leak a half-started browser when startup fails or is cancelled
+            await crawler.close()
+            raise
+        slot.crawler = crawler
+        slot.pages = 0
+        slot.failures = 0
+        self.stats['launched'] += 1
+        print(f"Browser {slot.slot_id} launched")
+
+    async def _retire(self, slot: _PooledCrawler):
+        if slot.crawler is None:
+            return
+        try:
+            await slot.crawler.close()
+        except Exception as e:
+            print(f"Error closing browser {slot.slot_id}: {e}")
+        slot.crawler = None
+
+    def _is_alive(self, slot: _PooledCrawler) -> bool:
+        """Whether the slot's browser is still connected, for browsers that crashed or were killed"""
+        manager = getattr(getattr(slot.crawler, 'crawler_strategy', None), 'browser_manager', None)
+        browser = getattr(manager, 'browser', None) or getattr(getattr(manager, 'default_context', None),
+                                                               'browser', None)
+        if browser is None:
+            # No handle to probe (not started yet, or a persistent context); rely on the failure count
+            return True
+        try:
+            return browser.is_connected()
+        except Exception:
+            return False
+
+    def _is_healthy(self, slot: _PooledCrawler) -> bool:
+        return slot.pages < self.max_pages and slot.failures < self.max_failures and self._is_alive(slot)
+
+    async def start(self):
+        """Launch every browser up front so the first leases are warm"""
+        self._ensure_slots()
+        idle = [slot for slot in self._slots if slot.crawler is None]
+        await asyncio.gather(*(self._launch(slot) for slot in idle))
+
+    async def crawl(self, url: str, config=None):
+        """Crawl one URL on a leased browser and return the crawl4ai result"""
+        async with self._lease_slot() as slot:
+            result = await slot.crawler.arun(url, config=config)
+            if not result.success:
+                slot.succeeded = False
+            return result
+
+    @asynccontextmanager
+    async def _lease_slot(self):
+        self._ensure_slots()
+        idle = self._idle
+        slot = await idle.get()
+        try:
+            if slot.crawler is not None and not self._is_healthy(slot):
+                await self._retire(slot)
+                self.stats['recycled'] += 1
+            if slot.crawler is None:
+                await self._launch(slot)
+
+            self.stats['leases'] += 1
+            slot.pages += 1
+            slot.succeeded = True
+            try:
+                yield slot
+            except Exception:
+                slot.failures += 1
+                raise
+            slot.failures = 0 if slot.succeeded else slot.failures + 1
+        finally:
+            if slot not in self._slots:
+                # The pool was closed while this browser was out
+                await self._retire(slot)
+            else:
+                if slot.crawler is not None and not self._is_healthy(slot):
+                    await self._retire(slot)
+                    self.stats['recycled'] += 1
+                idle.put_nowait(slot)
+
+    async def close(self):
+        """Close every idle browser; leased ones are closed as they come back"""
+        if self._idle is None:
+            return
+        idle, self._idle, self._slots, self._loop = self._idle, None, [], None
+        while not idle.empty():
+            await self._retire(idle.get_nowait())
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -4,26 +4,113 @@ Comprehensive Research System - DuckDuckGo Search + Content Scraping
 """
 
 import requests
-from bs4 import BeautifulSoup
 import asyncio
+import contextvars
 import json
 import os
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
+import math
 import re
-from typing import List, Dict, Tuple
-from crawler import extract_markdown
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+from page_fetcher import fetch_page
+from browser_pool import CrawlerPool
+from crawl_cache import CrawlCache, canonical_url
+from dedup import SourceDeduplicator
+from research_output import (ResearchResult, ResearchWriter, SourceSpool, iter_source_file, report_header,
+                             report_section)
+from passages import format_passages, select_passages
+from search_client import AsyncSearchClient, build_query_variants, parse_ddg_results
+from search_cache import SearchCache, recency_ttl
+from research_store import ResearchStore
+from ranking import BM25Ranker
+
+
+# canonical URL -> in-flight fetch, shared by the queries of one batch; set in each batch query's task
+_batch_page_tasks: contextvars.ContextVar = contextvars.ContextVar('batch_page_tasks', default=None)
+
+
+class EnoughContent:
+    """Tracks whether scraped sources already cover what a research step needs"""
+    
+    def __init__(self, sources: int, chars: int, min_source_chars: int = 500):
+        self.sources = sources
+        self.chars = chars
+        self.min_source_chars = min_source_chars
+        self.good_sources = 0
+        self.good_chars = 0
+    
+    def add(self, item: Dict) -> bool:
+        """Count a scraped source; returns True once there is enough"""
+        if item['length'] >= self.min_source_chars:
+            self.good_sources += 1
+            self.good_chars += item['length']
+        return self.reached()
+    
+    def reached(self) -> bool:
+        return self.good_sources >= self.sources or self.good_chars >= self.chars
 
 
 class ComprehensiveResearcher:
-    def __init__(self):
+    def __init__(self, pool_size: int = 4, pages_per_browser: int = 50, max_concurrency: int = None,
+                 per_host_limit: int = 2, url_timeout: float = 45.0,
+                 cache_path: str = 'crawl_cache.db', cache_ttl: float = 6 * 3600,
+                 http_fast_path: bool = True, dedup_threshold: float = 0.8, max_query_variants: int = 3,
+                 search_cache_path: str = 'search_cache.db', domain_priors=None,
+                 output_dir: str = '.', compress_sources: bool = False,
+                 archive_path: str = 'research_store.db', overfetch_ratio: float = 2.0,
+                 sufficient_chars: int = 15000, min_source_chars: int = 500):
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         })
+        # Browsers are launched on first use and reused across scrapes
+        self.crawler_pool = CrawlerPool(size=pool_size, max_pages=pages_per_browser)
+        # Scrape limits; by default one scrape per pooled browser
+        self.max_concurrency = max_concurrency or pool_size
+        self.per_host_limit = per_host_limit
+        self.url_timeout = url_timeout
+        # Extracted pages are reused across runs; pass cache_path=None to always crawl
+        self.crawl_cache = CrawlCache(cache_path, ttl=cache_ttl, session=self.session) if cache_path else None
+        # Try a plain GET before rendering pages in a browser
+        self.http_fast_path = http_fast_path
+        # Similarity at which a source counts as a copy of a better-ranked one; None keeps everything
+        self.dedup_threshold = dedup_threshold
+        # Pooled async search; one query plus up to max_query_variants - 1 strategy phrasings
+        self.search_cache = SearchCache(search_cache_path) if search_cache_path else None
+        self.search_client = AsyncSearchClient(cache=self.search_cache)
+        self.max_query_variants = max_query_variants
+        # domain_priors: {domain: boost} or a callable url -> boost; defaults to a few news outlets
+        self.ranker = BM25Ranker(domain_priors=domain_priors)
+        # Research files go to output_dir; compress_sources writes the per-source JSONL gzipped
+        self.output_dir = output_dir
+        self.compress_sources = compress_sources
+        # Every scraped source is archived with a full-text index; fresh matches skip the network
+        self.research_store = ResearchStore(archive_path) if archive_path else None
+        # First-sufficient scraping: candidates per wanted source, and when to stop
+        self.overfetch_ratio = overfetch_ratio
+        self.sufficient_chars = sufficient_chars
+        self.min_source_chars = min_source_chars
+        # Scrape limits are shared by every query running on this researcher
+        self._limits_loop = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+    
+    async def close(self):
+        """Shut down the shared browser pool and search connections"""
+        await self.crawler_pool.close()
+        await self.search_client.close()
     
-    def ddg_search(self, query: str, max_results: int = 10) -> List[Dict]:
+    def ddg_search(self, query: str, max_results: int = 10, recency_level: str = None) -> List[Dict]:
         """Search DuckDuckGo and return results with metadata"""
+        if self.search_cache is not None:
+            cached = self.search_cache.get(query, max_results, recency_level)
+            if cached is not None:
+                print(f"Using cached results for: {query}")
+                return cached
+        
         print(f"Searching DuckDuckGo for: {query}")
         
         url = "https://html.duckduckgo.com/html/"
@@ -32,211 +119,411 @@ class ComprehensiveResearcher:
         try:
             resp = self.session.post(url, data=data, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            results = []
-            links = soup.find_all('a', href=True)
-            
-            for link in links[:max_results * 2]:
-                try:
-                    href = link.get('href', '')
-                    text = link.get_text(strip=True)
-                    
-                    if not href.startswith('http') or len(text) < 10:
-                        continue
-                    
-                    # Skip internal DuckDuckGo links
-                    if 'duckduckgo.com' in href or 'duck.co' in href:
-                        continue
-                    
-                    # Skip common non-content links
-                    skip_domains = ['youtube.com', 'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com']
-                    if any(domain in href for domain in skip_domains):
-                        continue
-                    
-                    results.append({
-                        'title': text,
-                        'url': href,
-                        'snippet': text[:200] + '...' if len(text) > 200 else text
-                    })
-                    
-                    if len(results) >= max_results:
-                        break
-                        
-                except Exception as e:
-                    continue
+            results = parse_ddg_results(resp.text, max_results)
             
             print(f"Found {len(results)} results")
+            if self.search_cache is not None:
+                self.search_cache.put(query, max_results, results, recency_level)
             return results
             
         except Exception as e:
             print(f"Search failed: {e}")
             return []
     
+    async def search_async(self, query: str, max_results: int = 10, search_strategy: str = None,
+                           recency_level: str = None) -> List[Dict]:
+        """Search several phrasings of a query in parallel without blocking the event loop"""
+        queries = build_query_variants(query, search_strategy, self.max_query_variants)
+        return await self.search_client.multi_search(queries, max_results, recency_level)
+    
     def evaluate_relevance(self, result: Dict, query: str) -> float:
-        """Evaluate relevance of a search result"""
-        title = result.get('title', '').lower()
-        snippet = result.get('snippet', '').lower()
-        query_terms = query.lower().split()
-        
-        score = 0.0
-        
-        # Title relevance (higher weight)
-        title_matches = sum(1 for term in query_terms if term in title)
-        score += title_matches * 2.0
-        
-        # Snippet relevance
-        snippet_matches = sum(1 for term in query_terms if term in snippet)
-        score += snippet_matches * 1.0
-        
-        # URL domain authority (basic)
-        url = result.get('url', '')
-        if any(domain in url for domain in ['nytimes.com', 'washingtonpost.com', 'bbc.com', 'reuters.com', 'cnn.com']):
-            score += 1.0
-        
-        return score
+        """Evaluate relevance of a search result on its own"""
+        return self.ranker.score_all([result], query)[0]
     
     def select_top_urls(self, results: List[Dict], query: str, top_n: int = 6) -> List[Dict]:
         """Select top N most relevant URLs"""
         if not results:
             return []
         
-        # Score all results
-        scored_results = []
-        for result in results:
-            score = self.evaluate_relevance(result, query)
-            scored_results.append((result, score))
-        
-        # Sort by score (descending)
-        scored_results.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return top N
-        top_results = [result for result, score in scored_results[:top_n]]
+        # BM25 over title, snippet and URL, plus domain priors
+        top_results = self.ranker.top_k(results, query, top_n)
         print(f"Selected top {len(top_results)} most relevant URLs")
         
         return top_results
     
-    async def scrape_urls(self, urls: List[Dict]) -> List[Dict]:
-        """Scrape content from URLs using crawl4ai"""
-        print(f"Scraping content from {len(urls)} URLs...")
+    def _scrape_limits(self) -> Tuple[asyncio.Semaphore, Dict[str, asyncio.Semaphore]]:
+        """Global and per-host semaphores for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._limits_loop is not loop:
+            self._limits_loop = loop
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._host_limits = {}
+        return self._global_limit, self._host_limits
+    
+    async def _fetch_limited(self, url: str, url_timeout: float) -> Dict:
+        """Fetch a page under the global and per-host limits
         
-        scraped_content = []
+        url_timeout only starts once both limits are acquired, so a URL
+        waiting its turn in a busy batch is never timed out unfetched.
+        """
+        global_limit, host_limits = self._scrape_limits()
+        host = urlparse(url).netloc.lower()
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
         
-        for i, url_info in enumerate(urls):
-            try:
-                url = url_info['url']
-                print(f"Scraping {i+1}/{len(urls)}: {url}")
-                
-                # Use crawl4ai for robust content extraction
-                content = await extract_markdown(url)
-                
-                if content and len(content.strip()) > 100:
-                    scraped_content.append({
-                        'url': url,
-                        'title': url_info.get('title', ''),
-                        'content': content,
-                        'length': len(content)
-                    })
-                    print(f"Successfully scraped {len(content)} characters")
-                else:
-                    print(f"Failed to extract meaningful content")
-                    
-            except Exception as e:
-                print(f"Error scraping {url_info['url']}: {e}")
-                continue
+        async with host_limit, global_limit:
+            # Cache, then plain HTTP, then crawl4ai for pages that need a browser
+            return await asyncio.wait_for(fetch_page(
+                url,
+                session=self.session if self.http_fast_path else None,
+                pool=self.crawler_pool,
+                cache=self.crawl_cache
+            ), timeout=url_timeout)
+    
+    def _fetch_shared(self, url: str, url_timeout: float) -> Tuple[asyncio.Future, bool]:
+        """Return (fetch task, shared) for a URL
         
-        print(f"Successfully scraped {len(scraped_content)} URLs")
-        return scraped_content
+        During a batch, every query asking for the same canonical URL gets the
+        same task, so the page is fetched and cleaned once.
+        """
+        page_tasks = _batch_page_tasks.get()
+        if page_tasks is None:
+            return asyncio.ensure_future(self._fetch_limited(url, url_timeout)), False
+        key = canonical_url(url)
+        task = page_tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_limited(url, url_timeout))
+            page_tasks[key] = task
+        else:
+            print(f"Reusing fetch of {url} from another query in the batch")
+        return task, True
     
-    def consolidate_content(self, scraped_content: List[Dict], query: str) -> str:
-        """Consolidate all scraped content into a single text"""
-        print("Consolidating scraped content...")
+    async def _scrape_one(self, index: int, url_info: Dict, total: int, url_timeout: float) -> Tuple[Dict, str]:
+        """Scrape a single URL, sharing the fetch with other queries in a batch"""
+        url = url_info['url']
+        print(f"Scraping {index+1}/{total}: {url}")
+        task, shared = self._fetch_shared(url, url_timeout)
+        try:
+            # A shared fetch outlives one query's cancellation
+            page = await (asyncio.shield(task) if shared else task)
+        except asyncio.TimeoutError:
+            print(f"Timed out scraping {url}")
+            return None, f"Timed out after {url_timeout:.0f} seconds"
         
-        consolidated = f"RESEARCH RESULTS FOR: {query}\n"
-        consolidated += "=" * 80 + "\n\n"
+        content = page['content']
+        if content and len(content.strip()) > 100:
+            print(f"Successfully scraped {len(content)} characters from {url} ({page['tier']})")
+            return {
+                'url': url,
+                'title': url_info.get('title', ''),
+                'content': content,
+                'length': len(content),
+                'tier': page['tier']
+            }, None
         
-        for i, item in enumerate(scraped_content, 1):
-            consolidated += f"SOURCE {i}: {item['title']}\n"
-            consolidated += f"URL: {item['url']}\n"
-            consolidated += f"CONTENT LENGTH: {item['length']} characters\n"
-            consolidated += "-" * 40 + "\n"
-            consolidated += item['content']
-            consolidated += "\n\n" + "=" * 80 + "\n\n"
+        print(f"Failed to extract meaningful content from {url}")
+        return None, 'No meaningful content extracted'
+    
+    async def iter_scrapes(self, urls: List[Dict], url_timeout: float = None,
+                           deadline: float = None) -> AsyncIterator[Tuple[int, Dict, Optional[Dict], Optional[str]]]:
+        """Scrape URLs concurrently, yielding (rank, url_info, item, error) as each one finishes
         
-        return consolidated
+        rank is the position in urls. deadline is a budget in seconds for the
+        whole batch; scrapes still running when it expires are cancelled and
+        yielded as failures. Breaking out of the loop cancels the rest.
+        """
+        print(f"Scraping content from {len(urls)} URLs (up to {self.max_concurrency} at a time)...")
+        
+        url_timeout = url_timeout or self.url_timeout
+        tasks = {
+            asyncio.create_task(self._scrape_one(i, url_info, len(urls), url_timeout)): i
+            for i, url_info in enumerate(urls)
+        }
+        pending = set(tasks)
+        ends_at = None if deadline is None else time.monotonic() + deadline
+        try:
+            while pending:
+                timeout = None if ends_at is None else max(0.0, ends_at - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print(f"Research deadline reached, cancelled {len(pending)} scrapes")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    for task in sorted(pending, key=tasks.get):
+                        yield tasks[task], urls[tasks[task]], None, 'Cancelled at research deadline'
+                    pending = set()
+                    break
+                
+                for task in sorted(done, key=tasks.get):
+                    rank = tasks[task]
+                    if task.exception() is not None:
+                        error = str(task.exception())
+                        print(f"Error scraping {urls[rank]['url']}: {error}")
+                        yield rank, urls[rank], None, error
+                    else:
+                        item, error = task.result()
+                        yield rank, urls[rank], item, error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
     
-    async def comprehensive_research(self, query: str, max_results: int = 10, top_urls: int = 6) -> Dict:
-        """Perform comprehensive research on a query"""
-        print(f"Starting comprehensive research for: {query}")
+    def _print_scrape_summary(self, tiers: Dict[str, int]):
+        print(f"Successfully scraped {sum(tiers.values())} URLs {tiers}")
+        if self.crawl_cache is not None:
+            print(self.crawl_cache.summary())
+        if self.research_store is not None:
+            print(self.research_store.summary())
+    
+    async def scrape_urls_detailed(self, urls: List[Dict], url_timeout: float = None,
+                                   deadline: float = None) -> Tuple[List[Dict], List[Dict]]:
+        """Scrape URLs concurrently and return (scraped content, failures)
         
-        # Step 1: Search DuckDuckGo
-        search_results = self.ddg_search(query, max_results)
+        Both lists keep the ranking order of urls. deadline is a budget in
+        seconds for the whole batch; scrapes still running when it expires
+        are cancelled and reported as failures.
+        """
+        scraped, failed = [], []
+        tiers = {}
+        async for rank, url_info, item, error in self.iter_scrapes(urls, url_timeout, deadline):
+            if item:
+                scraped.append((rank, item))
+                tiers[item['tier']] = tiers.get(item['tier'], 0) + 1
+            else:
+                failed.append((rank, {'url': url_info['url'], 'title': url_info.get('title', ''), 'error': error}))
         
-        if not search_results:
-            return {
-                'query': query,
-                'error': 'No search results found',
-                'content': '',
-                'sources': []
-            }
+        self._print_scrape_summary(tiers)
+        return [item for _, item in sorted(scraped, key=lambda pair: pair[0])], \
+               [failure for _, failure in sorted(failed, key=lambda pair: pair[0])]
+    
+    async def scrape_urls(self, urls: List[Dict]) -> List[Dict]:
+        """Scrape content from URLs"""
+        scraped_content, _ = await self.scrape_urls_detailed(urls)
+        return scraped_content
+    
+    def consolidate_content(self, scraped_content: List[Dict], query: str) -> str:
+        """Consolidate all scraped content into a single text"""
+        print("Consolidating scraped content...")
         
-        # Step 2: Select most relevant URLs
-        top_urls_list = self.select_top_urls(search_results, query, top_urls)
+        parts = [report_header(query)]
+        parts.extend(report_section(i, item) for i, item in enumerate(scraped_content, 1))
+        return ''.join(parts)
+    
+    async def comprehensive_research(self, query: str, max_results: int = 10, top_urls: int = 6,
+                                     deadline: float = None, search_strategy: str = None,
+                                     recency_level: str = None, notes: str = None,
+                                     token_budget: int = None, first_sufficient: bool = False) -> Dict:
+        """Perform comprehensive research on a query
         
-        if not top_urls_list:
-            return {
-                'query': query,
-                'error': 'No relevant URLs found',
-                'content': '',
-                'sources': []
-            }
+        deadline optionally bounds the whole research step in seconds.
+        search_strategy and recency_level come from intent analysis; the first
+        adds query variants, the second sets how long search results are cached.
+        With token_budget, the result also carries 'context': the passages
+        most relevant to the query and the intent notes, within that many
+        tokens, each attributed to its source.
+        With first_sufficient, overfetch_ratio times as many candidates are
+        scraped and the step ends as soon as top_urls good sources or
+        sufficient_chars of content have arrived, instead of waiting for the
+        slowest site.
         
-        # Step 3: Scrape content from selected URLs
-        scraped_content = await self.scrape_urls(top_urls_list)
+        Sources are spooled to disk as scrapes finish, then deduplicated and
+        written out in ranking order one at a time. The return value is a
+        ResearchResult whose 'content' and 'sources' are only read back from
+        the output files when accessed; when nothing usable was found it is
+        empty and has an 'error'.
+        """
+        print(f"Starting comprehensive research for: {query}")
+        started = time.monotonic()
         
-        if not scraped_content:
-            return {
-                'query': query,
-                'error': 'Failed to scrape content from URLs',
-                'content': '',
-                'sources': []
-            }
+        # Step 1: Reuse fresh archived sources that cover the whole query
+        archived = []
+        if self.research_store is not None:
+            archived = await asyncio.to_thread(self.research_store.find_sources, query,
+                                               recency_ttl(recency_level), top_urls)
+            if archived:
+                print(f"Found {len(archived)} fresh sources in the research store")
         
-        # Step 4: Consolidate content
-        consolidated_content = self.consolidate_content(scraped_content, query)
+        top_urls_list = []
+        if len(archived) < top_urls:
+            # Step 2: Search DuckDuckGo
+            search_results = await self.search_async(query, max_results, search_strategy, recency_level)
+            archived_urls = {canonical_url(item['url']) for item in archived}
+            search_results = [result for result in search_results if canonical_url(result['url']) not in archived_urls]
+            
+            if not search_results and not archived:
+                return ResearchResult.failed(query, 'No search results found')
+            
+            # Step 3: Select most relevant URLs, plus spares when stopping at the first sufficient set
+            wanted = top_urls - len(archived)
+            if first_sufficient:
+                wanted = math.ceil(wanted * self.overfetch_ratio)
+            top_urls_list = self.select_top_urls(search_results, query, wanted)
+            
+            if not top_urls_list and not archived:
+                return ResearchResult.failed(query, 'No relevant URLs found')
         
-        # Step 5: Save results
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         safe_query = re.sub(r'[^\w\s-]', '', query).strip()
         safe_query = re.sub(r'[-\s]+', '_', safe_query)
+        base_path = os.path.join(self.output_dir, f"research_{safe_query}_{timestamp}")
         
-        # Save JSON
-        json_filename = f"research_{safe_query}_{timestamp}.json"
-        research_data = {
-            'query': query,
-            'timestamp': timestamp,
-            'sources': scraped_content,
-            'total_sources': len(scraped_content),
-            'total_content_length': sum(item['length'] for item in scraped_content)
-        }
+        # Step 4: Scrape the selected URLs, spooling each page to disk as it arrives
+        remaining = None
+        if deadline is not None:
+            remaining = max(0.0, deadline - (time.monotonic() - started))
+        failed = []
+        tiers = {}
+        enough = EnoughContent(top_urls, self.sufficient_chars, self.min_source_chars) if first_sufficient else None
+        with SourceSpool(base_path + '.spool.jsonl') as spool:
+            # Archived sources rank ahead of everything scraped
+            for i, item in enumerate(archived):
+                spool.add(i - len(archived), item)
+                tiers['archive'] = tiers.get('archive', 0) + 1
+                if enough is not None:
+                    enough.add(item)
+            if top_urls_list and not (enough and enough.reached()):
+                async with aclosing(self.iter_scrapes(top_urls_list, deadline=remaining)) as scrapes:
+                    async for rank, url_info, item, error in scrapes:
+                        if item:
+                            spool.add(rank, item)
+                            tiers[item['tier']] = tiers.get(item['tier'], 0) + 1
+                            if self.research_store is not None:
+                                await asyncio.to_thread(self.research_store.add_source, item['url'], item['title'],
+                                                        item['content'], query=query)
+                            if enough is not None and enough.add(item):
+                                # Closing the generator cancels the scrapes still running
+                                print(f"Enough content after {len(spool)} sources, cancelling the remaining scrapes")
+                                break
+                        else:
+                            failed.append((rank, {'url': url_info['url'], 'title': url_info.get('title', ''), 'error': error}))
+            self._print_scrape_summary(tiers)
+            failures = [failure for _, failure in sorted(failed, key=lambda pair: pair[0])]
+            
+            if len(spool) == 0:
+                return ResearchResult.failed(query, 'Failed to scrape content from URLs', failures)
+            
+            # Steps 5 and 6: drop syndicated copies and repeated paragraphs, writing the rest in rank order
+            print("Consolidating scraped content...")
+            deduplicator = SourceDeduplicator(self.dedup_threshold) if self.dedup_threshold is not None else None
+            writer = ResearchWriter(base_path, query, compress=self.compress_sources)
+            try:
+                for item in spool.iter_ranked():
+                    if deduplicator is not None:
+                        item = deduplicator.add(item)
+                        if item is None:
+                            continue
+                    writer.add_source(item)
+            except BaseException:
+                writer.abort()
+                raise
         
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(research_data, f, indent=2)
+        dedup_report = deduplicator.report if deduplicator is not None else None
+        if dedup_report is not None:
+            print(f"Dropped {len(dedup_report['dropped_sources'])} duplicate sources and "
+                  f"{dedup_report['dropped_paragraphs']} repeated paragraphs "
+                  f"({dedup_report['dropped_chars']} characters)")
         
-        # Save text
-        txt_filename = f"research_{safe_query}_{timestamp}.txt"
-        with open(txt_filename, 'w', encoding='utf-8') as f:
-            f.write(consolidated_content)
+        # Step 7: Keep the best passages within the token budget, if one is set
+        writer.finish_sources()
+        retrieval = {}
+        if token_budget:
+            passages = await asyncio.to_thread(select_passages, lambda: iter_source_file(writer.sources_file),
+                                               query, notes, token_budget)
+            retrieval = {
+                'passages': passages,
+                'context': format_passages(query, passages) if passages else '',
+                'context_tokens': sum(passage['tokens'] for passage in passages)
+            }
+            print(f"Selected {len(passages)} passages ({retrieval['context_tokens']} of {token_budget} tokens)")
         
-        print(f"Research completed and saved to {json_filename} and {txt_filename}")
+        # Step 8: Write the summary
+        result = writer.close(timestamp=timestamp, failures=failures, dedup=dedup_report, **retrieval)
+        print(f"Research completed and saved to {result['txt_file']}, {result['sources_file']} and {result['json_file']}")
+        return result
+    
+    async def batch_research(self, queries: List[Union[str, Dict]], max_parallel_queries: int = 3,
+                             **research_kwargs) -> AsyncIterator[Dict]:
+        """Research many queries concurrently, yielding each result as soon as it finishes
         
-        return {
-            'query': query,
-            'content': consolidated_content,
-            'sources': scraped_content,
-            'json_file': json_filename,
-            'txt_file': txt_filename
-        }
+        queries are strings or dicts of comprehensive_research arguments
+        ({"query": ..., "recency_level": ...}); research_kwargs are defaults
+        for all of them. Queries share this researcher's scrape limits, and a
+        URL found by several queries is fetched once. A query that raises is
+        yielded as a result with an 'error' instead of stopping the batch.
+        """
+        specs = [item if isinstance(item, dict) else {'query': item} for item in queries]
+        query_limit = asyncio.Semaphore(max_parallel_queries)
+        page_tasks: Dict[str, asyncio.Future] = {}
+        
+        async def run(spec: Dict) -> Dict:
+            # Each task has its own context, so concurrent batches never see each other's fetches
+            _batch_page_tasks.set(page_tasks)
+            async with query_limit:
+                try:
+                    return await self.comprehensive_research(**{**research_kwargs, **spec})
+                except Exception as e:
+                    print(f"Research failed for {spec.get('query')}: {e}")
+                    return ResearchResult.failed(spec.get('query'), str(e))
+        
+        print(f"Starting batch research for {len(specs)} queries ({max_parallel_queries} at a time)")
+        tasks = [asyncio.create_task(run(spec)) for spec in specs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            fetches = list(page_tasks.values())
+            print(f"Batch fetched {len(fetches)} unique URLs")
+            # Only does anything if the consumer stopped iterating early
+            for task in tasks + fetches:
+                task.cancel()
+            await asyncio.gather(*tasks, *fetches, return_exceptions=True)
+
+
+def load_queries(path: str) -> List[Union[str, Dict]]:
+    """Read batch queries from a JSONL file
+    
+    Each line is a JSON object with a "query" key and optional
+    comprehensive_research arguments, a JSON string, or plain text.
+    """
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = line
+            if isinstance(item, dict) and not item.get('query'):
+                print(f"Skipping batch line without a query: {line}")
+                continue
+            queries.append(item if isinstance(item, (str, dict)) else line)
+    return queries
+
+
+async def run_batch(path: str, output: str = None, max_parallel_queries: int = 3):
+    """Research every query in a JSONL file, writing one summary line per finished query"""
+    researcher = ComprehensiveResearcher()
+    out = open(output, 'a', encoding='utf-8') if output else None
+    try:
+        async for result in researcher.batch_research(load_queries(path), max_parallel_queries):
+            summary = {
+                'query': result['query'],
+                'error': result.get('error'),
+                'total_sources': result.get('total_sources', 0),
+                'json_file': result.get('json_file'),
+                'txt_file': result.get('txt_file')
+            }
+            print(f"Finished: {json.dumps(summary)}")
+            if out:
+                out.write(json.dumps(summary) + "\n")
+                out.flush()
+    finally:
+        if out:
+            out.close()
+        await researcher.close()
 
 
 async def main():
@@ -244,15 +531,29 @@ async def main():
     researcher = ComprehensiveResearcher()
     
     query = "artificial intelligence trends 2024"
-    result = await researcher.comprehensive_research(query)
+    try:
+        result = await researcher.comprehensive_research(query)
+    finally:
+        await researcher.close()
     
     if 'error' in result:
         print(f"Research failed: {result['error']}")
     else:
         print(f"Research completed successfully!")
-        print(f"Found {len(result['sources'])} sources")
-        print(f"Total content length: {len(result['content'])} characters")
+        print(f"Found {result['total_sources']} sources")
+        print(f"Total content length: {result['total_content_length']} characters")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Research a query, or a batch of queries from a JSONL file")
+    parser.add_argument('--batch', help="JSONL file with one query per line")
+    parser.add_argument('--output', help="append one JSON summary line per finished query to this file")
+    parser.add_argument('--parallel', type=int, default=3, help="queries researched at the same time")
+    args = parser.parse_args()
+    
+    if args.batch:
+        asyncio.run(run_batch(args.batch, args.output, args.parallel))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Persistent crawl cache - extracted pages keyed by canonical URL
+"""
+
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+
+
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref_src')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so trivially different links share one cache entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class CrawlCache:
+    """SQLite-backed cache of raw markdown and cleaned text per URL
+
+    Entries expire after their TTL. Expired entries that carry an ETag or
+    Last-Modified header can be revalidated with a conditional GET instead
+    of a full browser render. The store is capped at max_bytes and evicts
+    least recently used entries first.
+    """
+
+    def __init__(self, path: str = 'crawl_cache.db', ttl: float = 6 * 3600,
+                 max_bytes: int = 200 * 1024 * 1024, session: Optional[requests.Session] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.stats: Dict[str, int] = {
+            'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0
+        }
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    markdown TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; commits on success and always closes"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(canonical_url(url).encode('utf-8')).hexdigest()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL, with 'fresh' set if it is within its TTL"""
+        now = time.time()
+        key = self._key(url)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, markdown, content, etag, last_modified, fetched_at, expires_at "
+                "FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            conn.execute("UPDATE pages SET last_access = ? WHERE key = ?", (now, key))
+
+        entry = {
+            'url': row[0],
+            'markdown': row[1],
+            'content': row[2],
+            'etag': row[3],
+            'last_modified': row[4],
+            'fetched_at': row[5],
+            'expires_at': row[6],
+            'fresh': row[6] > now
+        }
+        if entry['fresh']:
+            self.stats['hits'] += 1
+        else:
+            self.stats['stale'] += 1
+        return entry
+
+    def store(self, url: str, markdown: str, content: str, headers: Optional[Dict] = None,
+              ttl: Optional[float] = None):
+        """Cache a crawled page along with any validators from its response headers"""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        now = time.time()
+        size = len(markdown.encode('utf-8')) + len(content.encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(url), url, markdown, content,
+                    hashlib.sha256(markdown.encode('utf-8')).hexdigest(),
+                    headers.get('etag'), headers.get('last-modified'),
+                    now, now + (self.ttl if ttl is None else ttl), now, size
+                )
+            )
+            self.stats['stores'] += 1
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the store fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM pages ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self.stats['evictions'] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def revalidate(self, entry: Dict, ttl: Optional[float] = None) -> bool:
+        """Ask the origin whether a stale entry changed; extend its TTL if it did not"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if not headers:
+            return False
+
+        try:
+            resp = self.session.get(entry['url'], headers=headers, timeout=10, stream=True)
+            resp.close()
+        except Exception as e:
+            print(f"Revalidation failed for {entry['url']}: {e}")
+            return False
+        if resp.status_code != 304:
+            return False
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE pages SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + (self.ttl if ttl is None else ttl), now, self._key(entry['url']))
+            )
+        self.stats['revalidated'] += 1
+        return True
+
+    def summary(self) -> str:
+        """One-line hit/miss report"""
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['stale']
+        served = self.stats['hits'] + self.stats['revalidated']
+        rate = served / lookups * 100 if lookups else 0.0
+        return (f"Crawl cache: {served}/{lookups} served from cache ({rate:.0f}%), "
+                f"{self.stats['revalidated']} revalidated, {self.stats['misses']} misses, "
+                f"{self.stats['evictions']} evictions")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for scraped sources
+
+Each source is reduced to a bottom-k MinHash sketch of its word shingles,
+so building sketches is linear in the total content size and comparing
+two sources costs O(k) no matter how long they are.
+"""
+
+import hashlib
+import heapq
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash_sketch(text: str, shingle_size: int = 5, sketch_size: int = 128) -> List[int]:
+    """Return the sketch_size smallest hashes of the word shingles in text"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return sorted(heapq.nsmallest(sketch_size, {_hash64(shingle) for shingle in shingles}))
+
+
+def estimate_similarity(sketch_a: List[int], sketch_b: List[int]) -> float:
+    """Estimate the Jaccard similarity of two texts from their bottom-k sketches"""
+    if not sketch_a or not sketch_b:
+        return 0.0
+    size = min(len(sketch_a), len(sketch_b))
+    union = heapq.nsmallest(size, set(sketch_a) | set(sketch_b))
+    in_a = set(sketch_a)
+    in_b = set(sketch_b)
+    shared = sum(1 for value in union if value in in_a and value in in_b)
+    return shared / len(union)
+
+
+def _paragraph_key(paragraph: str) -> int:
+    return _hash64(' '.join(WORD_RE.findall(paragraph.lower())))
+
+
+class SourceDeduplicator:
+    """Streaming form of deduplicate_sources
+
+    Feed sources one at a time in ranking order; only sketches and
+    paragraph hashes are kept, never the content of earlier sources.
+    """
+
+    def __init__(self, threshold: float = 0.8, min_paragraph_chars: int = 80, min_content_chars: int = 100):
+        self.threshold = threshold
+        self.min_paragraph_chars = min_paragraph_chars
+        self.min_content_chars = min_content_chars
+        self.report = {
+            'threshold': threshold,
+            'dropped_sources': [],
+            'dropped_paragraphs': 0,
+            'dropped_chars': 0
+        }
+        self._kept: List[Tuple[str, List[int]]] = []
+        self._seen_paragraphs: Set[int] = set()
+
+    def add(self, source: Dict) -> Optional[Dict]:
+        """Return the source with repeated paragraphs removed, or None if it is dropped"""
+        report = self.report
+        sketch = minhash_sketch(source['content'])
+        for other_url, other_sketch in self._kept:
+            similarity = estimate_similarity(sketch, other_sketch)
+            if similarity >= self.threshold:
+                report['dropped_sources'].append({
+                    'url': source['url'],
+                    'reason': 'near_duplicate',
+                    'duplicate_of': other_url,
+                    'similarity': round(similarity, 3)
+                })
+                report['dropped_chars'] += source['length']
+                return None
+        self._kept.append((source['url'], sketch))
+
+        paragraphs = []
+        for paragraph in source['content'].split('\n'):
+            if len(paragraph) >= self.min_paragraph_chars:
+                key = _paragraph_key(paragraph)
+                if key in self._seen_paragraphs:
+                    report['dropped_paragraphs'] += 1
+                    report['dropped_chars'] += len(paragraph) + 1
+                    continue
+                self._seen_paragraphs.add(key)
+            paragraphs.append(paragraph)
+
+        content = '\n'.join(paragraphs)
+        if len(content.strip()) < self.min_content_chars:
+            # Nothing left once the paragraphs seen in earlier sources are gone
+            report['dropped_sources'].append({
+                'url': source['url'],
+                'reason': 'repeated_paragraphs',
+                'duplicate_of': None,
+                'similarity': None
+            })
+            report['dropped_chars'] += len(content)
+            return None
+        return dict(source, content=content, length=len(content))
+
+
+def deduplicate_sources(sources: List[Dict], threshold: float = 0.8, min_paragraph_chars: int = 80,
+                        min_content_chars: int = 100) -> Tuple[List[Dict], Dict]:
+    """Drop near-duplicate sources and paragraphs repeated across sources
+
+    Sources are visited in ranking order, so the best-ranked copy of a
+    syndicated story is the one kept. A source is dropped when its
+    estimated similarity to an already kept source reaches threshold.
+    Within the kept sources, any line of at least min_paragraph_chars that
+    already appeared (ignoring case and punctuation) in an earlier source
+    is removed. Returns the kept sources and a report of what was dropped.
+    """
+    deduplicator = SourceDeduplicator(threshold, min_paragraph_chars, min_content_chars)
+    result = []
+    for source in sources:
+        kept = deduplicator.add(source)
+        if kept is not None:
+            result.append(kept)
+    return result, deduplicator.report
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tiered page fetching - crawl cache, then plain HTTP, then a headless browser
+"""
+
+import asyncio
+import re
+import threading
+import weakref
+from typing import Dict, Optional
+import requests
+from bs4 import BeautifulSoup
+from crawler import crawl_page, lookup_cached
+from text_cleaner import clean_text
+
+
+# Tags that never hold article text
+NOISE_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'form', 'button',
+              'nav', 'header', 'footer', 'aside']
+
+# Block tags turned into markdown-ish paragraphs
+BLOCK_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'blockquote', 'pre']
+
+# Mount points used by client-side rendered apps
+APP_ROOT_IDS = ['root', 'app', '__next', '__nuxt', 'svelte']
+
+JS_REQUIRED_RE = re.compile(r'(enable|requires?|turn on)\s+javascript|javascript\s+(is\s+)?(required|disabled)', re.IGNORECASE)
+
+# Each worker thread's own copies of the sessions handed to fetch_http
+_thread_sessions = threading.local()
+
+
+def looks_js_rendered(soup: BeautifulSoup, html: str) -> bool:
+    """Guess whether a page needs a browser to show its content"""
+    for noscript in soup.find_all('noscript'):
+        if JS_REQUIRED_RE.search(noscript.get_text(' ', strip=True)):
+            return True
+
+    for root_id in APP_ROOT_IDS:
+        mount = soup.find(id=root_id)
+        if mount is not None and len(mount.get_text(strip=True)) < 200:
+            return True
+
+    # Almost no visible text compared to markup usually means scripts build the page
+    body = soup.body or soup
+    text_length = len(body.get_text(' ', strip=True))
+    return len(html) > 20000 and text_length < len(html) * 0.02
+
+
+def extract_main_content(soup: BeautifulSoup) -> str:
+    """Pull the main article text out of server-rendered HTML as simple markdown"""
+    for tag in soup.find_all(NOISE_TAGS):
+        tag.decompose()
+
+    root = (soup.find('article') or soup.find('main') or soup.find(attrs={'role': 'main'})
+            or soup.body or soup)
+
+    blocks = []
+    for element in root.find_all(BLOCK_TAGS):
+        # Nested blocks are already covered by their outermost block
+        if element.find_parent(BLOCK_TAGS) is not None:
+            continue
+        text = element.get_text(' ', strip=True)
+        if not text:
+            continue
+        if element.name[0] == 'h' and element.name[1:].isdigit():
+            text = '#' * int(element.name[1:]) + ' ' + text
+        elif element.name == 'li':
+            text = '- ' + text
+        blocks.append(text)
+
+    return '\n\n'.join(blocks)
+
+
+def thread_session(session: requests.Session) -> requests.Session:
+    """This thread's copy of session, with the same headers, cookies and proxies
+
+    requests.Session is not thread-safe, so concurrent fetch_http calls in
+    asyncio.to_thread workers each get a session of their own.
+    """
+    sessions = getattr(_thread_sessions, 'sessions', None)
+    if sessions is None:
+        sessions = _thread_sessions.sessions = weakref.WeakKeyDictionary()
+    own = sessions.get(session)
+    if own is None:
+        own = requests.Session()
+        own.headers.update(session.headers)
+        own.cookies.update(session.cookies)
+        own.proxies.update(session.proxies)
+        own.verify = session.verify
+        sessions[session] = own
+    return own
+
+
+def fetch_http(session: requests.Session, url: str, timeout: float = 10.0) -> Optional[Dict]:
+    """Fetch a page with a plain GET and extract its main content
+
+    The GET goes through this thread's copy of session (see thread_session).
+    """
+    resp = thread_session(session).get(url, timeout=timeout)
+    if resp.status_code != 200 or 'html' not in resp.headers.get('Content-Type', ''):
+        return None
+
+    html = resp.text
+    soup = BeautifulSoup(html, "html.parser")
+    if looks_js_rendered(soup, html):
+        return None
+
+    return {
+        'markdown': extract_main_content(soup),
+        'headers': dict(resp.headers)
+    }
+
+
+async def fetch_page(url: str, session: Optional[requests.Session] = None, pool=None, cache=None,
+                     min_content_length: int = 800) -> Dict:
+    """Fetch cleaned page content from the cheapest tier that yields enough of it
+
+    Tiers are tried in order: 'cache' (if a CrawlCache is given), 'http'
+    (if a session is given) and 'browser'. The HTTP result is only used
+    when the page does not look JS-rendered and its cleaned text is at
+    least min_content_length characters; if the browser then fails too,
+    that shorter HTTP content is returned but not cached. Returns a dict
+    with 'content' and the 'tier' that served it, 'failed' when no tier
+    produced anything.
+    """
+    if cache is not None:
+        cached = await lookup_cached(url, cache)
+        if cached is not None:
+            return {'content': cached, 'tier': 'cache'}
+
+    page = None
+    if session is not None:
+        try:
+            page = await asyncio.to_thread(fetch_http, session, url)
+        except Exception as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+
+    content = clean_text(page['markdown']) if page else ''
+    tier = 'http' if content else 'failed'
+    if len(content) < min_content_length:
+        print(f"Escalating {url} to browser")
+        try:
+            browser_page = await crawl_page(url, pool=pool)
+        except Exception as e:
+            print(f"Error crawling {url}: {e}")
+            browser_page = None
+        # Keep whatever plain HTTP produced if the browser gets nothing
+        if browser_page:
+            page = browser_page
+            content = clean_text(page['markdown'])
+            tier = 'browser'
+
+    # Short HTTP content is only a fallback; a later fetch may do better
+    if cache is not None and (tier == 'browser' or len(content) >= min_content_length):
+        await asyncio.to_thread(cache.store, url, page['markdown'], content, headers=page['headers'])
+
+    return {'content': content, 'tier': tier}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Passage retrieval - split cleaned sources into passages and keep the best ones within a token budget
+"""
+
+import heapq
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from ranking import BM25Ranker, tokenize
+
+
+# Rough size of an English token; close enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+# Passage text counts fully, the source title a little; no domain boosts
+PASSAGE_FIELD_WEIGHTS = {'snippet': 1.0, 'title': 0.3}
+
+# Candidates kept while scoring cover this many token budgets, so passages
+# skipped for overflowing the budget still leave others to fill it
+HELD_BUDGETS = 2
+
+
+def split_passages(text: str, max_chars: int = 800) -> List[str]:
+    """Group consecutive lines of cleaned text into passages of up to max_chars
+
+    Lines are never split, so a single line longer than max_chars becomes a
+    passage of its own.
+    """
+    passages = []
+    current: List[str] = []
+    size = 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if current and size + len(line) + 1 > max_chars:
+            passages.append('\n'.join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        passages.append('\n'.join(current))
+    return passages
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def select_passages(sources: Union[Callable[[], Iterable[Dict]], Iterable[Dict]], query: str,
+                    notes: Optional[str] = None, token_budget: int = 3000, max_chars: int = 800,
+                    notes_weight: float = 0.5) -> List[Dict]:
+    """Pick the passages most relevant to the query and intent notes that fit in token_budget
+
+    Passages are scored with BM25 against the query, plus notes_weight
+    times their score against the notes, and taken greedily from the best
+    down, skipping any that would overflow the budget and stopping at
+    passages that match nothing, so nothing is returned when no passage is
+    relevant. The selection is returned in source order, then passage
+    order, so each source's excerpts read in sequence. Every passage keeps
+    its source number, URL and title.
+
+    sources is read twice, once for BM25's corpus statistics and once to
+    score, so pass a function returning a fresh iterator (such as
+    ResearchResult.iter_sources) to stream a large crawl from disk. Only
+    the best passages covering HELD_BUDGETS times the budget are held in
+    memory while scoring.
+    """
+    read_sources = sources if callable(sources) else lambda: sources
+    query_terms = set(tokenize(query))
+    notes_terms = set(tokenize(notes)) if notes else set()
+
+    def iter_passages():
+        for number, source in enumerate(read_sources(), 1):
+            title_tokens = tokenize(source.get('title', ''))
+            for position, text in enumerate(split_passages(source['content'], max_chars)):
+                yield number, source, text, {'snippet': tokenize(text), 'title': title_tokens}
+
+    ranker = BM25Ranker(field_weights=PASSAGE_FIELD_WEIGHTS, domain_priors={})
+    stats = ranker.corpus_stats((doc for _, _, _, doc in iter_passages()), query_terms | notes_terms)
+    if not stats['total']:
+        return []
+    query_idf = ranker.idf(stats, query_terms)
+    notes_idf = ranker.idf(stats, notes_terms)
+
+    # Min-heap of (score, -order, tokens, passage): the worst candidate is evicted first
+    held = []
+    held_tokens = 0
+    for order, (number, source, text, doc) in enumerate(iter_passages()):
+        score = ranker.score_doc(doc, query_terms, query_idf, stats['avg_length'])
+        if notes:
+            score += notes_weight * ranker.score_doc(doc, notes_terms, notes_idf, stats['avg_length'])
+        tokens = estimate_tokens(text)
+        if score <= 0 or tokens > token_budget:
+            # Matches nothing, or could never fit
+            continue
+        passage = {'source': number, 'url': source['url'], 'title': source.get('title', ''), 'text': text,
+                   'score': round(score, 4), 'tokens': tokens}
+        heapq.heappush(held, (score, -order, tokens, passage))
+        held_tokens += tokens
+        while held_tokens - held[0][2] >= token_budget * HELD_BUDGETS:
+            held_tokens -= heapq.heappop(held)[2]
+
+    selected = []
+    used = 0
+    for score, neg_order, tokens, passage in sorted(held, key=lambda item: (-item[0], -item[1])):
+        if used + tokens > token_budget:
+            continue
+        used += tokens
+        selected.append((-neg_order, passage))
+    return [passage for _, passage in sorted(selected, key=lambda item: item[0])]
+
+
+def format_passages(query: str, passages: List[Dict]) -> str:
+    """Render selected passages as prompt-ready text with a header per source"""
+    parts = [f"RESEARCH PASSAGES FOR: {query}\n" + "=" * 80 + "\n"]
+    current = None
+    for passage in passages:
+        if passage['source'] != current:
+            current = passage['source']
+            parts.append(f"\n[SOURCE {current}] {passage['title']}\nURL: {passage['url']}\n")
+        parts.append(passage['text'] + "\n")
+    return ''.join(parts)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+BM25 ranking of search results over title, snippet and URL fields
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+from urllib.parse import urlsplit
+
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'why', 'with'
+}
+
+# Same outlets the old relevance check treated as authoritative
+DEFAULT_DOMAIN_PRIORS = {
+    'nytimes.com': 1.0,
+    'washingtonpost.com': 1.0,
+    'bbc.com': 1.0,
+    'reuters.com': 1.0,
+    'cnn.com': 1.0
+}
+
+DEFAULT_FIELD_WEIGHTS = {'title': 2.0, 'snippet': 1.0, 'url': 0.5}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# (suffix, replacement) pairs tried longest first; a light Porter-style stemmer
+SUFFIXES = [
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ments', 'ment'), ('ness', ''), ('ment', ''), ('ings', ''), ('ing', ''),
+    ('edly', ''), ('ies', 'y'), ('ied', 'y'), ('sses', 'ss'), ('ly', ''), ('ed', ''),
+    ('es', ''), ('s', '')
+]
+
+
+def stem(word: str) -> str:
+    """Strip common English suffixes, keeping at least three characters of stem"""
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == 's' and word.endswith(('ss', 'us', 'is')):
+                return word
+            word = word[:-len(suffix)] + replacement
+            # running -> run, not runn
+            if suffix in ('ing', 'ed') and len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    # update / updated / updates all end up as updat
+    if word.endswith('e') and len(word) >= 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stop words and stem"""
+    return [stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def url_text(url: str) -> str:
+    """Host and path words of a URL, e.g. 'bbc co uk news world 123'"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return f"{host} {parts.path}"
+
+
+DomainPriors = Union[Dict[str, float], Callable[[str], float]]
+
+
+class BM25Ranker:
+    """BM25F scorer for search results with pluggable domain priors
+
+    Field term frequencies are length-normalized per field, weighted and
+    summed before BM25 saturation. IDF is computed over the candidate set
+    being ranked. domain_priors is either a {domain: boost} dict matched
+    against the host and its parent domains, or a callable url -> boost.
+    """
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75,
+                 domain_priors: Optional[DomainPriors] = None):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.domain_priors = DEFAULT_DOMAIN_PRIORS if domain_priors is None else domain_priors
+
+    def domain_prior(self, url: str) -> float:
+        if callable(self.domain_priors):
+            return self.domain_priors(url)
+        labels = urlsplit(url).netloc.lower().split(':')[0].split('.')
+        for i in range(len(labels) - 1):
+            boost = self.domain_priors.get('.'.join(labels[i:]))
+            if boost is not None:
+                return boost
+        return 0.0
+
+    def _fields(self, result: Dict) -> Dict[str, List[str]]:
+        texts = {
+            'title': result.get('title', ''),
+            'snippet': result.get('snippet', ''),
+            'url': url_text(result.get('url', ''))
+        }
+        return {field: tokenize(texts[field]) for field in self.field_weights}
+
+    def corpus_stats(self, docs: Iterable[Dict[str, List[str]]], terms: Set[str]) -> Dict:
+        """Document count, average field lengths and document frequencies of terms, in one pass over docs
+
+        docs are {field: tokens} dicts, so a large corpus can be streamed
+        through here and scored in a second pass with score_doc().
+        """
+        total = 0
+        lengths = Counter()
+        doc_freq = Counter()
+        for doc in docs:
+            total += 1
+            for field in self.field_weights:
+                lengths[field] += len(doc[field])
+            doc_freq.update({term for field in self.field_weights for term in doc[field] if term in terms})
+        avg_length = {field: (lengths[field] / total if total else 0.0) or 1.0 for field in self.field_weights}
+        return {'total': total, 'avg_length': avg_length, 'doc_freq': doc_freq}
+
+    def idf(self, stats: Dict, terms: Set[str]) -> Dict[str, float]:
+        total, doc_freq = stats['total'], stats['doc_freq']
+        return {term: math.log(1 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5)) for term in terms}
+
+    def score_doc(self, doc: Dict[str, List[str]], terms: Set[str], idf: Dict[str, float],
+                  avg_length: Dict[str, float]) -> float:
+        """BM25F score of one {field: tokens} doc, without the domain prior"""
+        count = {field: Counter(tokens) for field, tokens in doc.items()}
+        score = 0.0
+        for term in terms:
+            weighted_tf = 0.0
+            for field, weight in self.field_weights.items():
+                tf = count[field][term]
+                if tf:
+                    norm = 1 - self.b + self.b * len(doc[field]) / avg_length[field]
+                    weighted_tf += weight * tf / norm
+            if weighted_tf:
+                score += idf[term] * weighted_tf / (self.k1 + weighted_tf)
+        return score
+
+    def score_all(self, results: List[Dict], query: str) -> List[float]:
+        """Score every result against the query"""
+        query_terms = set(tokenize(query))
+        if not results:
+            return []
+
+        docs = [self._fields(result) for result in results]
+        stats = self.corpus_stats(docs, query_terms)
+        idf = self.idf(stats, query_terms)
+        return [self.score_doc(doc, query_terms, idf, stats['avg_length']) + self.domain_prior(result.get('url', ''))
+                for result, doc in zip(results, docs)]
+
+    def top_k(self, results: List[Dict], query: str, k: int) -> List[Dict]:
+        """Return the k best results, ties kept in their original order"""
+        scores = self.score_all(results, query)
+        best = heapq.nlargest(k, range(len(results)), key=lambda i: (scores[i], -i))
+        return [results[i] for i in best]
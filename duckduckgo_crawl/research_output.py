@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Streaming writers and lazy readers for research output files
+
+A run produces three files sharing one base name:
+    <base>.txt           consolidated report, one section per source
+    <base>.jsonl[.gz]    one JSON line per source
+    <base>.json          small summary (totals, failures, dedup report)
+Sources are written one at a time, so memory stays bounded by the largest
+source rather than the whole crawl.
+"""
+
+import gzip
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+
+SECTION_RULE = "=" * 80
+SOURCE_RULE = "-" * 40
+
+
+def open_sources(path: str, mode: str):
+    """Open a JSONL sources file, gzip-compressed when it ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_source_file(path: str) -> Iterator[Dict]:
+    """Stream sources back from a JSONL file one at a time"""
+    with open_sources(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def report_header(query: str) -> str:
+    return f"RESEARCH RESULTS FOR: {query}\n{SECTION_RULE}\n\n"
+
+
+def report_section(number: int, item: Dict) -> str:
+    """Text block for one source in the consolidated report"""
+    return (
+        f"SOURCE {number}: {item['title']}\n"
+        f"URL: {item['url']}\n"
+        f"CONTENT LENGTH: {item['length']} characters\n"
+        f"{SOURCE_RULE}\n"
+        f"{item['content']}"
+        f"\n\n{SECTION_RULE}\n\n"
+    )
+
+
+class SourceSpool:
+    """Scratch JSONL file holding scraped sources until they can be read back in rank order
+
+    Scrapes finish in any order; each is appended as it arrives and only
+    its byte offset is kept in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets: Dict[int, int] = {}
+        self._file = open(path, 'w+b')
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def add(self, rank: int, item: Dict):
+        self._file.seek(0, os.SEEK_END)
+        self._offsets[rank] = self._file.tell()
+        self._file.write(json.dumps(item).encode('utf-8') + b"\n")
+
+    def iter_ranked(self) -> Iterator[Dict]:
+        """Yield spooled sources by ascending rank, reading one at a time"""
+        self._file.flush()
+        for rank in sorted(self._offsets):
+            self._file.seek(self._offsets[rank])
+            yield json.loads(self._file.readline())
+
+    def close(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ResearchWriter:
+    """Write the report, sources and summary of a research run as sources arrive"""
+
+    def __init__(self, base_path: str, query: str, compress: bool = False):
+        self.query = query
+        self.txt_file = base_path + '.txt'
+        self.sources_file = base_path + ('.jsonl.gz' if compress else '.jsonl')
+        self.json_file = base_path + '.json'
+        self.total_sources = 0
+        self.total_content_length = 0
+        self._txt = open(self.txt_file, 'w', encoding='utf-8')
+        self._sources = open_sources(self.sources_file, 'w')
+        self._txt.write(report_header(query))
+
+    def add_source(self, item: Dict):
+        self.total_sources += 1
+        self.total_content_length += item['length']
+        self._txt.write(report_section(self.total_sources, item))
+        self._sources.write(json.dumps(item) + "\n")
+
+    def abort(self):
+        """Close and delete partially written files"""
+        self._txt.close()
+        self._sources.close()
+        for path in (self.txt_file, self.sources_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def finish_sources(self):
+        """Close the report and sources files so they can be read back"""
+        self._txt.close()
+        self._sources.close()
+
+    def close(self, **summary) -> 'ResearchResult':
+        """Finish the files, write the JSON summary and return a lazy handle to the result"""
+        self.finish_sources()
+        fields = {
+            'query': self.query,
+            'total_sources': self.total_sources,
+            'total_content_length': self.total_content_length,
+            **summary,
+            'json_file': self.json_file,
+            'txt_file': self.txt_file,
+            'sources_file': self.sources_file
+        }
+        with open(self.json_file, 'w', encoding='utf-8') as f:
+            json.dump(fields, f, indent=2)
+        return ResearchResult(fields)
+
+
+class ResearchResult(Mapping):
+    """Result of a research run whose 'content' and 'sources' are read from disk on first access
+
+    Behaves like the dict comprehensive_research used to return, so
+    result['content'] still works; iter_sources() streams without loading
+    everything.
+    """
+
+    LAZY_KEYS = ('content', 'sources')
+
+    def __init__(self, fields: Dict):
+        self._fields = dict(fields)
+        self._content: Optional[str] = None
+        self._source_list: Optional[List[Dict]] = None
+
+    @classmethod
+    def failed(cls, query: str, error: str, failures: Optional[List[Dict]] = None) -> 'ResearchResult':
+        """A run that produced no sources; 'error' says why and nothing is read from disk"""
+        fields = {'query': query, 'error': error, 'total_sources': 0, 'total_content_length': 0}
+        if failures is not None:
+            fields['failures'] = failures
+        result = cls(fields)
+        result._content = ''
+        result._source_list = []
+        return result
+
+    @classmethod
+    def load(cls, json_file: str) -> 'ResearchResult':
+        """Reopen a saved run from its JSON summary"""
+        with open(json_file, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def read_text(self) -> str:
+        if self._content is None:
+            with open(self._fields['txt_file'], encoding='utf-8') as f:
+                self._content = f.read()
+        return self._content
+
+    def iter_sources(self) -> Iterator[Dict]:
+        if self._source_list is not None:
+            return iter(self._source_list)
+        return iter_source_file(self._fields['sources_file'])
+
+    def __getitem__(self, key):
+        if key == 'content':
+            return self.read_text()
+        if key == 'sources':
+            if self._source_list is None:
+                self._source_list = list(self.iter_sources())
+            return self._source_list
+        return self._fields[key]
+
+    def __iter__(self):
+        yield from self._fields
+        yield from self.LAZY_KEYS
+
+    def __len__(self) -> int:
+        return len(self._fields) + len(self.LAZY_KEYS)
+
+    def __repr__(self) -> str:
+        if 'error' in self._fields:
+            return f"ResearchResult({self._fields['query']!r}, error={self._fields['error']!r})"
+        return f"ResearchResult({self._fields['query']!r}, {self._fields['total_sources']} sources, {self._fields['txt_file']!r})"
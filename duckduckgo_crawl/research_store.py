@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Local research archive with full-text search over every scraped source
+
+Sources are stored once per canonical URL (newest fetch wins) and split
+into passages indexed with SQLite FTS5, so past crawls can answer
+"fresh passages about X fetched in the last N hours" without the network.
+The archive is capped, dropping the oldest fetches first.
+
+Usage (from duckduckgo_crawl/):
+    python research_store.py ingest research_*.json
+    python research_store.py search "h1b visa fees" --hours 24
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from crawl_cache import canonical_url
+from passages import split_passages
+from ranking import STOP_WORDS
+from research_output import iter_source_file
+
+
+MATCH_TOKEN_RE = re.compile(r'\w+')
+
+
+def build_match_query(query: str, match_all: bool = True) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression of quoted terms
+
+    Quoting keeps user text from being read as FTS5 syntax. Returns None
+    when the query has no searchable words.
+    """
+    words = [word for word in MATCH_TOKEN_RE.findall(query.lower()) if word not in STOP_WORDS]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in dict.fromkeys(words)]
+    return (' AND ' if match_all else ' OR ').join(terms)
+
+
+class ResearchStore:
+    """SQLite archive of scraped sources with an FTS5 passage index
+
+    The store is capped at max_bytes of source content (the passage index
+    takes about as much again) and, if given, max_sources sources. Each
+    add_source() prunes the oldest fetches until both limits hold.
+    """
+
+    def __init__(self, path: str = 'research_store.db', passage_chars: int = 800,
+                 max_bytes: Optional[int] = 500 * 1024 * 1024, max_sources: Optional[int] = None):
+        self.path = path
+        self.passage_chars = passage_chars
+        self.max_bytes = max_bytes
+        self.max_sources = max_sources
+        self.stats: Dict[str, int] = {'lookups': 0, 'hits': 0, 'stores': 0, 'evictions': 0}
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL UNIQUE,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    query TEXT,
+                    fetched_at REAL NOT NULL,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            if 'size' not in {row[1] for row in conn.execute("PRAGMA table_info(sources)")}:
+                # Archives from before the size cap
+                conn.execute("ALTER TABLE sources ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE sources SET size = length(CAST(content AS BLOB))")
+            conn.execute("CREATE INDEX IF NOT EXISTS sources_fetched_at ON sources (fetched_at)")
+            # Covers the pruning totals and oldest-first scan without reading content
+            conn.execute("CREATE INDEX IF NOT EXISTS sources_fetched_at_size ON sources (fetched_at, size)")
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+                    text, title, source_id UNINDEXED, tokenize = 'porter unicode61'
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; commits on success and always closes"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_source(self, url: str, title: str, content: str, fetched_at: Optional[float] = None,
+                   query: Optional[str] = None):
+        """Store or replace a source and re-index its passages"""
+        key = canonical_url(url)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, fetched_at FROM sources WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if row[1] > fetched_at:
+                    # Keep the newer copy when backfilling old files
+                    return
+                conn.execute("DELETE FROM passages WHERE source_id = ?", (row[0],))
+                conn.execute("DELETE FROM sources WHERE id = ?", (row[0],))
+            source_id = conn.execute(
+                "INSERT INTO sources (key, url, title, query, fetched_at, content, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, title or '', query, fetched_at, content, len(content.encode('utf-8')))
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO passages (text, title, source_id) VALUES (?, ?, ?)",
+                [(passage, title or '', source_id) for passage in split_passages(content, self.passage_chars)]
+            )
+            self.stats['stores'] += 1
+            self._prune(conn)
+
+    def _fits(self, count: int, total: int) -> bool:
+        return ((self.max_sources is None or count <= self.max_sources)
+                and (self.max_bytes is None or total <= self.max_bytes))
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Drop the oldest fetched sources until the archive fits in max_bytes and max_sources"""
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sources").fetchone()
+        if self._fits(count, total):
+            return
+        pruned = []
+        rows = conn.execute("SELECT id, size FROM sources ORDER BY fetched_at")
+        for source_id, size in rows:
+            pruned.append(source_id)
+            count -= 1
+            total -= size
+            if self._fits(count, total):
+                break
+        rows.close()
+        placeholders = ','.join('?' * len(pruned))
+        conn.execute(f"DELETE FROM passages WHERE source_id IN ({placeholders})", pruned)
+        conn.execute(f"DELETE FROM sources WHERE id IN ({placeholders})", pruned)
+        self.stats['evictions'] += len(pruned)
+
+    def search_passages(self, query: str, max_age: Optional[float] = None, limit: int = 10,
+                        match_all: bool = False) -> List[Dict]:
+        """Best-matching passages from sources fetched within max_age seconds"""
+        match = build_match_query(query, match_all)
+        if match is None:
+            return []
+        oldest = 0.0 if max_age is None else time.time() - max_age
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT s.url, s.title, s.fetched_at, p.text, bm25(passages, 1.0, 2.0) AS score
+                FROM passages AS p JOIN sources AS s ON s.id = p.source_id
+                WHERE passages MATCH ? AND s.fetched_at >= ?
+                ORDER BY score LIMIT ?
+            """, (match, oldest, limit)).fetchall()
+        return [
+            {'url': url, 'title': title, 'fetched_at': fetched_at, 'text': text, 'score': -score}
+            for url, title, fetched_at, text, score in rows
+        ]
+
+    def find_sources(self, query: str, max_age: Optional[float] = None, limit: int = 6) -> List[Dict]:
+        """Whole sources with a passage containing every query word, best match first
+
+        Items have the same shape as freshly scraped ones, with tier 'archive'.
+        """
+        self.stats['lookups'] += 1
+        match = build_match_query(query, match_all=True)
+        if match is None:
+            return []
+        oldest = 0.0 if max_age is None else time.time() - max_age
+        with self._connect() as conn:
+            # bm25() cannot be aggregated, so pick each source's best passage here
+            source_ids = []
+            for (source_id,) in conn.execute("""
+                SELECT p.source_id
+                FROM passages AS p JOIN sources AS s ON s.id = p.source_id
+                WHERE passages MATCH ? AND s.fetched_at >= ?
+                ORDER BY bm25(passages, 1.0, 2.0)
+            """, (match, oldest)):
+                if source_id not in source_ids:
+                    source_ids.append(source_id)
+                    if len(source_ids) >= limit:
+                        break
+            rows = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    f"SELECT id, url, title, content, fetched_at FROM sources WHERE id IN ({','.join('?' * len(source_ids))})",
+                    source_ids
+                )
+            }
+        self.stats['hits'] += len(source_ids)
+        return [
+            {
+                'url': url,
+                'title': title,
+                'content': content,
+                'length': len(content),
+                'tier': 'archive',
+                'fetched_at': fetched_at
+            }
+            for url, title, content, fetched_at in (rows[source_id] for source_id in source_ids)
+        ]
+
+    def ingest_file(self, path: str) -> int:
+        """Backfill sources from a saved research_*.json file; returns how many were read"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        fetched_at = os.path.getmtime(path)
+        if 'sources' in data:
+            sources: Iterable[Dict] = data['sources']
+        elif data.get('sources_file'):
+            sources_file = os.path.join(os.path.dirname(path), os.path.basename(data['sources_file']))
+            sources = iter_source_file(sources_file)
+        else:
+            return 0
+
+        count = 0
+        for source in sources:
+            self.add_source(source['url'], source.get('title', ''), source['content'], fetched_at, data.get('query'))
+            count += 1
+        return count
+
+    def summary(self) -> str:
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+        return (f"Research store: {total} sources, {self.stats['hits']} archived sources reused "
+                f"in {self.stats['lookups']} lookups, {self.stats['stores']} stored, "
+                f"{self.stats['evictions']} pruned")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the local research archive")
+    parser.add_argument('--db', default='research_store.db', help="archive database path")
+    parser.add_argument('--max-mb', type=float, default=500, help="source content to keep before pruning the oldest")
+    parser.add_argument('--max-sources', type=int, help="sources to keep before pruning the oldest")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help="import saved research_*.json files")
+    ingest.add_argument('files', nargs='+')
+    search = commands.add_parser('search', help="print the best passages for a query")
+    search.add_argument('query')
+    search.add_argument('--hours', type=float, help="only passages fetched in the last N hours")
+    search.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args()
+
+    store = ResearchStore(args.db, max_bytes=int(args.max_mb * 1024 * 1024), max_sources=args.max_sources)
+    if args.command == 'ingest':
+        for path in args.files:
+            try:
+                print(f"{path}: {store.ingest_file(path)} sources")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"{path}: skipped ({e})")
+    else:
+        max_age = args.hours * 3600 if args.hours else None
+        for passage in store.search_passages(args.query, max_age, args.limit):
+            age = (time.time() - passage['fetched_at']) / 3600
+            print(f"[{passage['score']:.2f}] {passage['title']} ({passage['url']}, {age:.1f}h old)")
+            print(passage['text'])
+            print()
+    print(store.summary())
+
+
+if __name__ == "__main__":
+    main()
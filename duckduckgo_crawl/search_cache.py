@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Persistent search-result cache keyed by normalized query
+"""
+
+import json
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from ranking import STOP_WORDS
+
+
+# How long results stay valid for each RECENCY_LEVEL the intent prompt emits
+RECENCY_TTLS = {
+    'IMMEDIATE': 15 * 60,
+    'ONGOING': 2 * 3600,
+    'SHORT_TERM': 6 * 3600,
+    'LONG_TERM': 7 * 24 * 3600
+}
+DEFAULT_RECENCY = 'SHORT_TERM'
+
+
+def normalize_query(query: str) -> str:
+    """Reduce a query to a key that ignores case, spacing, punctuation, stop words and word order"""
+    words = re.findall(r'\w+', query.lower())
+    content_words = [word for word in words if word not in STOP_WORDS]
+    return ' '.join(sorted(content_words or words))
+
+
+def recency_ttl(recency_level: Optional[str]) -> float:
+    """TTL in seconds for a RECENCY_LEVEL value, tolerating extra text around it"""
+    level = (recency_level or '').upper()
+    for name, ttl in RECENCY_TTLS.items():
+        if name in level:
+            return ttl
+    return RECENCY_TTLS[DEFAULT_RECENCY]
+
+
+class SearchCache:
+    """SQLite-backed search cache that several worker processes can share
+
+    The database runs in WAL mode so readers never block the writer, and
+    every write is a single short transaction with a busy timeout.
+    """
+
+    def __init__(self, path: str = 'search_cache.db'):
+        self.path = path
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'stores': 0}
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    recency_level TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS searches_expires_at ON searches (expires_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; commits on success and always closes"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, query: str, max_results: int, recency_level: Optional[str] = None) -> Optional[List[Dict]]:
+        """Return cached results for an equivalent query, if at least as many were fetched
+
+        Results must be unexpired and also fresh enough for the reader's own
+        recency level, so an IMMEDIATE search never gets week-old results
+        stored by a LONG_TERM one.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT results FROM searches WHERE key = ? AND expires_at > ? AND fetched_at > ? "
+                "AND max_results >= ?",
+                (normalize_query(query), now, now - recency_ttl(recency_level), max_results)
+            ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return json.loads(row[0])[:max_results]
+
+    def put(self, query: str, max_results: int, results: List[Dict], recency_level: Optional[str] = None):
+        """Cache results with a TTL matching the query's recency level
+
+        An entry for the same key that fetched more results is kept, unless
+        it has expired or is too old for this query's own recency level, so
+        a small search never shrinks what a larger one cached.
+        """
+        if not results:
+            return
+        now = time.time()
+        ttl = recency_ttl(recency_level)
+        with self._connect() as conn:
+            stored = conn.execute(
+                "INSERT INTO searches (key, query, max_results, results, recency_level, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET query = excluded.query, max_results = excluded.max_results, "
+                "results = excluded.results, recency_level = excluded.recency_level, "
+                "fetched_at = excluded.fetched_at, expires_at = excluded.expires_at "
+                "WHERE excluded.max_results >= searches.max_results OR searches.expires_at <= excluded.fetched_at "
+                "OR searches.fetched_at <= ?",
+                (
+                    normalize_query(query), query, max_results, json.dumps(results),
+                    (recency_level or DEFAULT_RECENCY).upper(), now, now + ttl, now - ttl
+                )
+            ).rowcount
+            conn.execute("DELETE FROM searches WHERE expires_at <= ?", (now,))
+        if stored:
+            self.stats['stores'] += 1
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Async DuckDuckGo search with connection pooling and multi-query fan-out
+"""
+
+import asyncio
+import random
+import re
+from typing import Dict, List, Optional
+import aiohttp
+from bs4 import BeautifulSoup
+from crawl_cache import canonical_url
+
+
+DDG_HTML_URL = "https://html.duckduckgo.com/html/"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Common non-content links
+SKIP_DOMAINS = ['youtube.com', 'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com']
+
+# Search strategies that tell us to skip the web rather than what to look for
+GENERIC_STRATEGY_RE = re.compile(r'^(unknown|use ai knowledge\b)', re.IGNORECASE)
+STRATEGY_VERB_RE = re.compile(r'^(search( for)?|look( for| up)?|find|check|use)\s+', re.IGNORECASE)
+
+
+def parse_ddg_results(html: str, max_results: int = 10) -> List[Dict]:
+    """Extract result links from a DuckDuckGo HTML results page"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    results = []
+    links = soup.find_all('a', href=True)
+
+    for link in links[:max_results * 2]:
+        try:
+            href = link.get('href', '')
+            text = link.get_text(strip=True)
+
+            if not href.startswith('http') or len(text) < 10:
+                continue
+
+            # Skip internal DuckDuckGo links
+            if 'duckduckgo.com' in href or 'duck.co' in href:
+                continue
+
+            if any(domain in href for domain in SKIP_DOMAINS):
+                continue
+
+            results.append({
+                'title': text,
+                'url': href,
+                'snippet': text[:200] + '...' if len(text) > 200 else text
+            })
+
+            if len(results) >= max_results:
+                break
+
+        except Exception:
+            continue
+
+    return results
+
+
+def build_query_variants(query: str, search_strategy: Optional[str] = None, max_variants: int = 3) -> List[str]:
+    """Derive query phrasings from the intent's search strategy
+
+    "Search policy updates, visa processing changes" for "H1B visa" gives
+    "H1B visa", "H1B visa policy updates", "H1B visa visa processing changes".
+    """
+    variants = [query.strip()]
+    if search_strategy and not GENERIC_STRATEGY_RE.match(search_strategy.strip()):
+        for phrase in re.split(r',|;|\band\b', search_strategy):
+            phrase = STRATEGY_VERB_RE.sub('', phrase.strip().rstrip('.'))
+            if len(phrase) >= 4:
+                variants.append(f"{query.strip()} {phrase}")
+
+    unique = []
+    seen = set()
+    for variant in variants:
+        key = ' '.join(variant.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(variant)
+    return unique[:max_variants]
+
+
+def merge_results(result_lists: List[List[Dict]], queries: List[str]) -> List[Dict]:
+    """Interleave per-query results by rank and drop repeated URLs
+
+    Each merged result lists the queries that returned it under 'queries'.
+    """
+    merged: List[Dict] = []
+    by_url: Dict[str, Dict] = {}
+    longest = max((len(results) for results in result_lists), default=0)
+    for rank in range(longest):
+        for query, results in zip(queries, result_lists):
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            key = canonical_url(result['url'])
+            if key in by_url:
+                by_url[key]['queries'].append(query)
+                continue
+            item = dict(result, queries=[query])
+            by_url[key] = item
+            merged.append(item)
+    return merged
+
+
+class AsyncSearchClient:
+    """Non-blocking DuckDuckGo client that keeps connections alive between searches"""
+
+    def __init__(self, max_connections: int = 8, timeout: float = 10.0, retries: int = 3,
+                 backoff: float = 0.5, cache=None):
+        self.cache = cache
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT}
+            )
+        return self._session
+
+    async def _post(self, query: str) -> str:
+        """POST a query with retries and exponential backoff on transient errors"""
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.post(DDG_HTML_URL, data={"q": query}) as resp:
+                    if resp.status == 429 or resp.status >= 500:
+                        raise aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status, message=resp.reason or ''
+                        )
+                    resp.raise_for_status()
+                    return await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                if attempt == self.retries or (status is not None and status < 500 and status != 429):
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                print(f"Search for '{query}' failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def search(self, query: str, max_results: int = 10, recency_level: Optional[str] = None) -> List[Dict]:
+        """Search DuckDuckGo and return results with metadata
+
+        With a SearchCache, equivalent queries are answered from it for as
+        long as their recency level allows.
+        """
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, query, max_results, recency_level)
+            if cached is not None:
+                print(f"Using cached results for: {query}")
+                return cached
+
+        print(f"Searching DuckDuckGo for: {query}")
+        try:
+            html = await self._post(query)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            return []
+        results = parse_ddg_results(html, max_results)
+        print(f"Found {len(results)} results for: {query}")
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, query, max_results, results, recency_level)
+        return results
+
+    async def multi_search(self, queries: List[str], max_results: int = 10,
+                           recency_level: Optional[str] = None) -> List[Dict]:
+        """Run several query variants in parallel and merge their results by URL"""
+        result_lists = await asyncio.gather(
+            *(self.search(query, max_results, recency_level) for query in queries)
+        )
+        merged = merge_results(list(result_lists), queries)
+        print(f"Merged {sum(len(results) for results in result_lists)} results from "
+              f"{len(queries)} queries into {len(merged)} unique URLs")
+        return merged
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
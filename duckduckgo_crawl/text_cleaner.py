@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Line-level text cleaning for scraped pages
+
+All filter families are merged into one precompiled keyword expression at
+import time, so each line is classified with a single scan instead of one
+re.search per pattern.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+
+AD_PATTERNS = [
+    r'\b(advertisement|ad|sponsored|promoted|partner content|brand content|paid content|native ad)\b',
+    r'\b(subscribe|join|newsletter|email updates|daily digest|weekly digest|get premium|upgrade to|try premium)\b',
+    r'\b(limited time|special offer|deal|discount|sale|buy now|shop now|order now|click here|learn more)\b',
+    r'\b(affiliate|commission|earn money|make money|monetize|revenue)\b',
+    r'\b(click to|tap to|swipe to|download|install|get started|sign up now)\b',
+    r'\b(free trial|premium access|unlock|exclusive|bonus|gift)\b',
+    r'\b(popup|modal|overlay|banner|promo|offer|deal)\b',
+    r'\b(act now|don\'t miss|hurry|expires|ends soon|while supplies last)\b',
+    r'\b(guaranteed|risk-free|money back|satisfaction guaranteed)\b'
+]
+
+UI_PATTERNS = [
+    r'\b(sign up|sign in|login|register|follow|share|like|comment|subscribe)\b',
+    r'\b(open in app|download app|get the app|listen|watch|play|view|read more)\b',
+    r'\b(sitemap|privacy policy|terms of service|cookie policy|contact us|help|support)\b',
+    r'\b(about us|about|home|menu|navigation|skip to|jump to|back to top)\b',
+    r'\b(previous|next|more|less|show more|show less|back to|return to|continue)\b',
+    r'\b(search|filter|sort|category|tag|archive|rss|feed)\b',
+    r'\b(facebook|twitter|instagram|linkedin|youtube|tiktok|pinterest|reddit|snapchat)\b',
+    r'\b(tweet|retweet|pin|bookmark|save|favorite|react|emoji)\b',
+    r'\b(share on|follow us|connect with|join us|stay connected)\b',
+    r'\b(cookie consent|accept cookies|cookie settings|gdpr|privacy settings)\b',
+    r'\b(writing is for everyone|medium|wordpress|blogger|tumblr|substack)\b',
+    r'\b(recommended|trending|popular|featured|latest|breaking|news)\b'
+]
+
+NAVIGATION_PATTERNS = [
+    r'^(home|about|contact|services|products|blog|news|support|help|faq|login|register|sign up|sign in)$',
+    r'^(previous|next|back|forward|up|down|left|right|top|bottom)$',
+    r'^(page \d+|page \d+ of \d+|showing \d+ of \d+|results \d+-\d+ of \d+)$',
+    r'^(sort by|filter by|search|browse|explore|discover)$',
+    r'^(categories|tags|topics|sections|chapters|parts)$'
+]
+
+BOILERPLATE_PATTERNS = [
+    r'\b(copyright|all rights reserved|©|®|™)\b',
+    r'\b(privacy policy|terms of service|terms and conditions|disclaimer)\b',
+    r'\b(cookie policy|gdpr|data protection|legal notice)\b',
+    r'\b(accessibility|accessibility statement|wcag|ada)\b',
+    r'\b(sitemap|rss|atom|feed|syndication)\b',
+    r'\b(last updated|last modified|published|created|posted)\b',
+    r'\b(version \d+\.\d+|v\d+\.\d+|build \d+)\b'
+]
+
+SOCIAL_MEDIA_PATTERNS = [
+    r'\b(facebook|twitter|instagram|linkedin|youtube|tiktok|pinterest|reddit|snapchat|discord|telegram)\b',
+    r'\b(tweet|retweet|like|share|comment|follow|unfollow|subscribe|unsubscribe)\b',
+    r'\b(hashtag|mention|@|#|dm|direct message|story|post|reel|video)\b',
+    r'\b(profile|bio|handle|username|display name|avatar|cover photo)\b',
+    r'\b(engagement|reach|impressions|views|likes|shares|comments|followers|following)\b'
+]
+
+TECHNICAL_PATTERNS = [
+    r'\b(api|endpoint|request|response|status|code|error|exception|debug|log)\b',
+    r'\b(database|table|query|sql|nosql|mongodb|mysql|postgresql)\b',
+    r'\b(server|client|host|domain|subdomain|ip|address|port|protocol)\b',
+    r'\b(html|css|javascript|js|php|python|java|c\+\+|c#|ruby|go|rust)\b',
+    r'\b(framework|library|package|module|dependency|import|export)\b',
+    r'\b(git|github|gitlab|bitbucket|repository|commit|branch|merge|pull request)\b',
+    r'\b(docker|kubernetes|container|microservice|deployment|ci/cd|pipeline)\b'
+]
+
+# Keyword families matched against the lowercased line, in the order
+# clean_text has always applied them
+KEYWORD_FAMILIES = [
+    ('advertisement', AD_PATTERNS),
+    ('ui', UI_PATTERNS),
+    ('boilerplate', BOILERPLATE_PATTERNS),
+    ('social_media', SOCIAL_MEDIA_PATTERNS),
+    ('technical', TECHNICAL_PATTERNS)
+]
+
+FILTER_FAMILIES = ['advertisement', 'ui', 'navigation', 'boilerplate', 'social_media', 'technical']
+
+REGEX_METACHARACTERS = set('\\.^$*+?{}[]()|')
+
+
+def _compile_any(patterns, flags=0):
+    """Compile a pattern list into one expression that matches if any of them does"""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), flags)
+
+
+def _split_alternatives(pattern):
+    """Split a \\b(a|b|c)\\b pattern into its alternatives"""
+    if not (pattern.startswith(r'\b(') and pattern.endswith(r')\b')):
+        raise ValueError(f"Unsupported filter pattern: {pattern}")
+    return pattern[3:-3].split('|')
+
+
+def _build_trie_pattern(words):
+    """Build a regex alternation with shared prefixes factored out"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+def _build_keyword_engine():
+    """Merge every keyword family into one expression that matches if any family's keywords do"""
+    literals = {}
+    regexes = []
+    for family, patterns in KEYWORD_FAMILIES:
+        for pattern in patterns:
+            for alternative in _split_alternatives(pattern):
+                if REGEX_METACHARACTERS.intersection(alternative):
+                    regexes.append(alternative)
+                else:
+                    literals.setdefault(alternative, family)
+
+    alternation = [_build_trie_pattern(literals)] + regexes
+    return re.compile(r'\b(?:' + '|'.join(alternation) + r')\b')
+
+
+_KEYWORD_FILTER_RE = _build_keyword_engine()
+
+_AD_RE = _compile_any(AD_PATTERNS)
+_UI_RE = _compile_any(UI_PATTERNS)
+_NAVIGATION_RE = _compile_any(NAVIGATION_PATTERNS, re.IGNORECASE)
+_BOILERPLATE_RE = _compile_any(BOILERPLATE_PATTERNS)
+_SOCIAL_MEDIA_RE = _compile_any(SOCIAL_MEDIA_PATTERNS)
+_TECHNICAL_RE = _compile_any(TECHNICAL_PATTERNS)
+
+# Every filter family in FILTER_FAMILIES order, the precedence clean_text has always used
+_FAMILY_RES = [
+    ('advertisement', _AD_RE),
+    ('ui', _UI_RE),
+    ('navigation', _NAVIGATION_RE),
+    ('boilerplate', _BOILERPLATE_RE),
+    ('social_media', _SOCIAL_MEDIA_RE),
+    ('technical', _TECHNICAL_RE)
+]
+
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_URL_RE = re.compile(r'^https?://')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_RE = re.compile(r'^[\+]?[1-9][\d]{0,15}$')
+_DATE_RE = re.compile(r'^\d{1,2}[/-]\d{1,2}[/-]\d{2,4}$')
+_TIME_RE = re.compile(r'^\d{1,2}:\d{2}(:\d{2})?(\s?[AP]M)?$')
+_NUMBER_RE = re.compile(r'^\d+$')
+
+
+def is_advertisement_content(line):
+    """Check if line contains advertisement indicators"""
+    return _AD_RE.search(line.lower()) is not None
+
+
+def is_ui_element(line):
+    """Check if line is a UI element"""
+    return _UI_RE.search(line.lower()) is not None
+
+
+def is_navigation_content(line):
+    """Check if line is navigation or breadcrumb content"""
+    return _NAVIGATION_RE.search(line.strip()) is not None
+
+
+def is_boilerplate_content(line):
+    """Check if line is boilerplate content"""
+    return _BOILERPLATE_RE.search(line.lower()) is not None
+
+
+def is_social_media_content(line):
+    """Check if line is social media related content"""
+    return _SOCIAL_MEDIA_RE.search(line.lower()) is not None
+
+
+def is_technical_content(line):
+    """Check if line is technical/system content"""
+    return _TECHNICAL_RE.search(line.lower()) is not None
+
+
+def classify_line(line: str) -> Optional[str]:
+    """Return the filter family that rejects a line, or None if no family matches
+
+    A single scan for every family's keywords clears most lines at once.
+    A line with a keyword is then checked family by family in
+    FILTER_FAMILIES order, so it is reported under the family clean_text
+    has always removed it for, whichever of its keywords comes first.
+    """
+    line = line.strip()
+    lowered = line.lower()
+    if _KEYWORD_FILTER_RE.search(lowered) is None:
+        return 'navigation' if _NAVIGATION_RE.search(line) else None
+    for family, regex in _FAMILY_RES:
+        if regex.search(line if family == 'navigation' else lowered):
+            return family
+    return None
+
+
+def _rejection_reason(line):
+    """Return why clean_text drops a stripped, non-empty line, or None to keep it"""
+    # Skip very short lines (likely not content)
+    if len(line) < 10:
+        return 'short'
+
+    # Skip lines that are mostly punctuation or numbers
+    word_length = len(_NON_WORD_RE.sub('', line))
+    if word_length < 5:
+        return 'punctuation'
+
+    # Skip advertisement, UI, navigation, boilerplate, social media and technical content
+    family = classify_line(line)
+    if family:
+        return family
+
+    # Skip lines that are mostly URLs
+    if _URL_RE.match(line):
+        return 'url'
+
+    # Skip lines that are mostly email addresses
+    if _EMAIL_RE.match(line):
+        return 'email'
+
+    # Skip lines that are mostly phone numbers
+    if _PHONE_RE.match(line):
+        return 'phone'
+
+    # Skip lines that are mostly dates
+    if _DATE_RE.match(line):
+        return 'date'
+
+    # Skip lines that are mostly times
+    if _TIME_RE.match(line):
+        return 'time'
+
+    # Skip lines that are mostly numbers
+    if _NUMBER_RE.match(line):
+        return 'number'
+
+    # Skip lines that are mostly special characters
+    if word_length < len(line) * 0.3:
+        return 'special_characters'
+
+    return None
+
+
+def clean_text(text, stats: Optional[Dict[str, int]] = None):
+    """Clean and filter text content
+
+    If a stats dict is given, it is updated with a count of dropped lines
+    per rejection reason (filter family or pattern check).
+    """
+    if not text:
+        return ""
+
+    cleaned_lines: List[str] = []
+
+    for line in text.split('\n'):
+        line = line.strip()
+
+        # Skip empty lines
+        if not line:
+            continue
+
+        reason = _rejection_reason(line)
+        if reason:
+            if stats is not None:
+                stats[reason] = stats.get(reason, 0) + 1
+            continue
+
+        cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines)
@@ -5,11 +5,13 @@ Handles long scripts by splitting into chunks and stitching them together
 
 import asyncio
 import base64
+import hashlib
 import os
 import json
 import time
 from hume import HumeClient
 from dotenv import load_dotenv
+from telemetry import record_tts_chunk
 
 # Load environment variables
 load_dotenv()
@@ -63,8 +65,87 @@ def split_text_into_chunks(text: str, max_length: int = 2000):
     return chunks
 
 
-def generate_audio_from_script(script_text: str, output_filename: str = "podcast_audio.wav"):
-    """Generate audio from script text using Hume AI TTS"""
+VOICE = {
+    "id": "YOUR_VOICE_ID_HERE",
+    "provider": "HUME_AI"
+}
+
+# Check if script needs chunking (Hume API limit: 5000 characters)
+MAX_CHARS = 2000  # Smaller chunks for faster processing
+
+# Minimum seconds between the starts of two synthesis requests, to avoid rate limiting
+CHUNK_DELAY = 3
+
+
+def cut_chunk(buffer: str, max_length: int = MAX_CHARS):
+    """Cut one chunk of at most max_length off the front of buffer at the best boundary
+
+    Prefers a paragraph break, then a line break, then a sentence end, and
+    only splits mid-sentence when there is none. Returns (chunk, rest).
+    """
+    window = buffer[:max_length]
+    for separator in ('\n\n', '\n', '. ', '? ', '! '):
+        position = window.rfind(separator)
+        # Ignore boundaries so early that the chunk would be tiny
+        if position > max_length // 4:
+            end = position + len(separator)
+            return buffer[:end].strip(), buffer[end:]
+    return window.strip(), buffer[max_length:]
+
+
+class ScriptChunker:
+    """Cuts a script arriving piece by piece into TTS-ready chunks"""
+
+    def __init__(self, max_length: int = MAX_CHARS):
+        self.max_length = max_length
+        self.buffer = ""
+
+    def feed(self, text: str) -> list:
+        """Add streamed text; returns the chunks that are now complete"""
+        self.buffer += text
+        chunks = []
+        # Only cut once more than a chunk is buffered, so the boundary is the latest possible
+        while len(self.buffer) > self.max_length:
+            chunk, self.buffer = cut_chunk(self.buffer, self.max_length)
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> list:
+        """The remaining text as final chunks"""
+        rest, self.buffer = self.buffer, ""
+        return split_text_into_chunks(rest, self.max_length) if rest.strip() else []
+
+
+def chunk_checkpoint_path(chunk_dir: str, index: int, text: str) -> str:
+    """Where a chunk's audio is checkpointed; the name includes a hash of its text"""
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(chunk_dir, f"chunk_{index:04d}_{digest}.wav")
+
+
+def load_chunk_checkpoint(chunk_dir, index: int, text: str):
+    """Audio saved for this exact chunk by an earlier attempt, or None"""
+    if not chunk_dir:
+        return None
+    path = chunk_checkpoint_path(chunk_dir, index, text)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def save_chunk_checkpoint(chunk_dir, index: int, text: str, audio_data: bytes):
+    if not chunk_dir:
+        return
+    os.makedirs(chunk_dir, exist_ok=True)
+    path = chunk_checkpoint_path(chunk_dir, index, text)
+    with open(path + ".tmp", "wb") as f:
+        f.write(audio_data)
+    os.replace(path + ".tmp", path)
+
+
+def create_hume_client():
+    """Create a Hume client and check connectivity; returns None on failure"""
     
     # Load API key
     load_env()
@@ -73,12 +154,6 @@ def generate_audio_from_script(script_text: str, output_filename: str = "podcast
         print("Error: HUME_API_KEY not found in environment variables")
         return None
     
-    if not script_text.strip():
-        print("Error: No script text provided")
-        return None
-    
-    print(f"Processing script: {len(script_text)} characters")
-    
     # Create Hume client
     try:
         hume = HumeClient(api_key=api_key)
@@ -92,122 +167,190 @@ def generate_audio_from_script(script_text: str, output_filename: str = "podcast
     test_text = "Hello, this is a test."
     
     try:
-        test_response = hume.tts.synthesize_json(
+        synthesize_chunk(hume, test_text)
+        print("API connectivity test successful")
+    except Exception as e:
+        print(f"API connectivity test failed: {e}")
+        print("Check your HUME_API_KEY and network connection")
+        return None
+    
+    return hume
+
+
+def synthesize_chunk(hume, text: str) -> bytes:
+    """Synthesize one chunk of text and return the decoded audio"""
+    start_time = time.time()
+    try:
+        response = hume.tts.synthesize_json(
             utterances=[
                 {
-                    "voice": {
-                        "id": "YOUR_VOICE_ID_HERE",
-                        "provider": "HUME_AI"
-                    },
-                    "text": test_text
+                    "voice": VOICE,
+                    "text": text
                 }
             ],
             num_generations=1
         )
-        print("API connectivity test successful")
-    except Exception as e:
-        print(f"API connectivity test failed: {e}")
-        print("Check your HUME_API_KEY and network connection")
+        audio_data = base64.b64decode(response.generations[0].audio)
+    except Exception:
+        record_tts_chunk(len(text), time.time() - start_time, "failed")
+        raise
+    record_tts_chunk(len(text), time.time() - start_time)
+    return audio_data
+
+
+async def generate_audio_from_chunks(chunks, output_filename: str = "podcast_audio.wav", chunk_dir: str = None):
+    """Synthesize chunks from an async iterator as they arrive, appending each to the output file
+    
+    Lets synthesis start while the script is still being written. Chunks
+    are synthesized one at a time, in order, in a worker thread. With
+    chunk_dir, each chunk's audio is checkpointed there and reused on retry.
+    """
+    hume = None
+    successful_chunks = 0
+    total_chunks = 0
+    last_start = None
+    try:
+        with open(output_filename, "wb") as f:
+            async for chunk in chunks:
+                total_chunks += 1
+                audio_data = await asyncio.to_thread(load_chunk_checkpoint, chunk_dir, total_chunks, chunk)
+                if audio_data is not None:
+                    print(f"Chunk {total_chunks} restored from checkpoint")
+                    record_tts_chunk(len(chunk), 0.0, "restored")
+                    f.write(audio_data)
+                    successful_chunks += 1
+                    continue
+                if hume is None:
+                    # Only pay for the connectivity test once a chunk needs synthesizing
+                    hume = await asyncio.to_thread(create_hume_client)
+                    if hume is None:
+                        # Keep draining so the producer is never blocked on us
+                        async for _ in chunks:
+                            pass
+                        break
+                if last_start is not None:
+                    wait = CHUNK_DELAY - (time.time() - last_start)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                last_start = time.time()
+                try:
+                    print(f"Processing chunk {total_chunks} ({len(chunk)} characters)...")
+                    audio_data = await asyncio.to_thread(synthesize_chunk, hume, chunk)
+                    await asyncio.to_thread(save_chunk_checkpoint, chunk_dir, total_chunks, chunk, audio_data)
+                    f.write(audio_data)
+                    successful_chunks += 1
+                    print(f"Chunk {total_chunks} processed in {time.time() - last_start:.2f} seconds")
+                except Exception as e:
+                    print(f"Failed to process chunk {total_chunks}: {e}")
+                    print("Skipping this chunk and continuing...")
+    except BaseException:
+        # Cancelled or failed mid-stream; don't leave a truncated file behind
+        if os.path.exists(output_filename):
+            os.remove(output_filename)
+        raise
+    
+    if hume is None and successful_chunks < total_chunks:
+        # The Hume client could not be created
+        os.remove(output_filename)
+        return None
+    if not successful_chunks:
+        print("No audio chunks were successfully generated")
+        os.remove(output_filename)
+        return None
+    if chunk_dir and successful_chunks < total_chunks:
+        print(f"{total_chunks - successful_chunks} chunks failed; retry the run to synthesize only those")
+        os.remove(output_filename)
+        return None
+    
+    print(f"Audio saved as '{output_filename}'")
+    print(f"Generated from {successful_chunks} successful chunks out of {total_chunks} total")
+    return output_filename
+
+
+def generate_audio_from_script(script_text: str, output_filename: str = "podcast_audio.wav", chunk_dir: str = None):
+    """Generate audio from script text using Hume AI TTS
+    
+    With chunk_dir, each chunk's audio is checkpointed there, so a retry
+    only synthesizes the chunks that failed or never ran.
+    """
+    
+    if not script_text.strip():
+        print("Error: No script text provided")
         return None
     
-    # Check if script needs chunking (Hume API limit: 5000 characters)
-    MAX_CHARS = 2000  # Smaller chunks for faster processing
+    print(f"Processing script: {len(script_text)} characters")
     
     if len(script_text) > MAX_CHARS:
         print(f"Script is too long ({len(script_text)} chars). Splitting into chunks...")
         chunks = split_text_into_chunks(script_text, MAX_CHARS)
         print(f"Split into {len(chunks)} chunks")
-        
-        # Generate audio for each chunk
-        all_audio_data = []
-        successful_chunks = 0
-        
-        for i, chunk in enumerate(chunks):
-            try:
-                print(f"Processing chunk {i + 1}/{len(chunks)} ({len(chunk)} characters)...")
-                
-                start_time = time.time()
-                
-                response = hume.tts.synthesize_json(
-                    utterances=[
-                        {
-                            "voice": {
-                                "id": "YOUR_VOICE_ID_HERE",
-                                "provider": "HUME_AI"
-                            },
-                            "text": chunk
-                        }
-                    ],
-                    num_generations=1
-                )
-                
-                elapsed_time = time.time() - start_time
-                print(f"Chunk {i + 1} processed in {elapsed_time:.2f} seconds")
-                
-                # Get the audio data
-                audio = response.generations[0].audio
-                audio_data = base64.b64decode(audio)
-                all_audio_data.append(audio_data)
-                successful_chunks += 1
-                print(f"Chunk {i + 1} completed successfully")
-                
-                # Add delay between chunks to avoid rate limiting
-                if i < len(chunks) - 1:
-                    print("Waiting 3 seconds before next chunk...")
-                    time.sleep(3)
-                    
-            except Exception as e:
-                print(f"Failed to process chunk {i + 1}: {e}")
-                print("Skipping this chunk and continuing...")
-                continue
-        
-        if not all_audio_data:
-            print("No audio chunks were successfully generated")
-            return None
-        
-        # Combine all audio chunks
-        print("Combining audio chunks...")
-        combined_audio = b''.join(all_audio_data)
-        
-        # Save combined audio to WAV file
-        with open(output_filename, "wb") as f:
-            f.write(combined_audio)
-        
-        print(f"Audio saved as '{output_filename}'")
-        print(f"Generated from {successful_chunks} successful chunks out of {len(chunks)} total")
-        
-        return output_filename
-        
     else:
         # Script is short enough for single API call
         print(f"Script is short enough ({len(script_text)} chars). Generating audio in one call...")
+        chunks = [script_text]
+    
+    restored = [load_chunk_checkpoint(chunk_dir, i + 1, chunk) for i, chunk in enumerate(chunks)]
+    hume = None
+    if any(audio_data is None for audio_data in restored):
+        hume = create_hume_client()
+        if hume is None:
+            return None
+    
+    # Generate audio for each chunk
+    all_audio_data = []
+    successful_chunks = 0
+    synthesized = 0
+    
+    for i, chunk in enumerate(chunks):
+        if restored[i] is not None:
+            print(f"Chunk {i + 1} restored from checkpoint")
+            record_tts_chunk(len(chunk), 0.0, "restored")
+            all_audio_data.append(restored[i])
+            successful_chunks += 1
+            continue
+        
+        # Add delay between chunks to avoid rate limiting
+        if synthesized:
+            print(f"Waiting {CHUNK_DELAY} seconds before next chunk...")
+            time.sleep(CHUNK_DELAY)
+        synthesized += 1
         
         try:
-            response = hume.tts.synthesize_json(
-                utterances=[
-                    {
-                        "voice": {
-                            "id": "YOUR_VOICE_ID_HERE",
-                            "provider": "HUME_AI"
-                        },
-                        "text": script_text
-                    }
-                ],
-                num_generations=1
-            )
+            print(f"Processing chunk {i + 1}/{len(chunks)} ({len(chunk)} characters)...")
             
-            # Get the audio data
-            audio = response.generations[0].audio
-            audio_data = base64.b64decode(audio)
+            start_time = time.time()
             
-            # Save audio to WAV file
-            with open(output_filename, "wb") as f:
-                f.write(audio_data)
+            audio_data = synthesize_chunk(hume, chunk)
+            save_chunk_checkpoint(chunk_dir, i + 1, chunk, audio_data)
             
-            print(f"Audio saved as '{output_filename}'")
+            elapsed_time = time.time() - start_time
+            print(f"Chunk {i + 1} processed in {elapsed_time:.2f} seconds")
             
-            return output_filename
+            all_audio_data.append(audio_data)
+            successful_chunks += 1
+            print(f"Chunk {i + 1} completed successfully")
             
         except Exception as e:
-            print(f"Error generating audio: {e}")
-            return None
\ No newline at end of file
+            print(f"Failed to process chunk {i + 1}: {e}")
+            print("Skipping this chunk and continuing...")
+            continue
+    
+    if not all_audio_data:
+        print("No audio chunks were successfully generated")
+        return None
+    if chunk_dir and successful_chunks < len(chunks):
+        # Leave the gap for a retry to fill rather than checkpointing incomplete audio
+        print(f"{len(chunks) - successful_chunks} chunks failed; retry the run to synthesize only those")
+        return None
+    
+    # Combine all audio chunks
+    combined_audio = b''.join(all_audio_data)
+    
+    # Save combined audio to WAV file
+    with open(output_filename, "wb") as f:
+        f.write(combined_audio)
+    
+    print(f"Audio saved as '{output_filename}'")
+    print(f"Generated from {successful_chunks} successful chunks out of {len(chunks)} total")
+    
+    return output_filename
\ No newline at end of file
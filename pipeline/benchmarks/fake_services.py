@@ -0,0 +1,315 @@
+"""
+Fake Services - Local stand-ins for OpenAI chat completions, Hume TTS and the web search/crawl backend
+Every fake has a configurable latency distribution, error rate and payload size, so the pipeline runs offline
+"""
+
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PIPELINE_DIR not in sys.path:
+    sys.path.insert(0, PIPELINE_DIR)
+
+from prompts import INTENT_ANALYSIS_SYSTEM, INTENT_RESEARCH_SYSTEM, PODCAST_SCRIPT_SYSTEM, RESEARCH_SYSTEM
+
+# The stage a chat request belongs to, recognised by its exact static system message
+SYSTEM_STAGES = {
+    INTENT_ANALYSIS_SYSTEM: "intent",
+    INTENT_RESEARCH_SYSTEM: "intent_research",
+    RESEARCH_SYSTEM: "research",
+    PODCAST_SCRIPT_SYSTEM: "script"
+}
+
+SENTENCE = "This is a sentence the fake service wrote about the topic, said naturally. "
+
+
+class Latency:
+    """Seconds to wait per call, drawn from a fixed, uniform or lognormal distribution
+
+    Parsed from specs like "0.5", "uniform:0.2,1.0" or "lognormal:1.5,0.4"
+    (median seconds and sigma).
+    """
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0):
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, params = spec.partition(":")
+        if not params:
+            return cls("fixed", float(kind))
+        values = [float(value) for value in params.split(",")]
+        if kind not in ("fixed", "uniform", "lognormal") or len(values) != (1 if kind == "fixed" else 2):
+            raise ValueError(f"Bad latency spec {spec!r}; use N, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+        return cls(kind, *values)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            return random.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return random.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self.a
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{self.a:g}" + (f",{self.b:g}" if self.kind != "fixed" else "")
+
+
+class ServiceProfile:
+    """How one fake behaves: first-response latency, output rate, error rate and payload size
+
+    size is characters of output for text services and bytes of audio per
+    input character for TTS; rate is output characters per second after
+    the first response (0 means instant).
+    """
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0, size: int = 2000, rate: float = 0.0):
+        self.latency = Latency.parse(latency) if isinstance(latency, str) else latency
+        self.error_rate = error_rate
+        self.size = size
+        self.rate = rate
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+    def generation_time(self, characters: int) -> float:
+        return characters / self.rate if self.rate else 0.0
+
+    def to_dict(self) -> Dict:
+        return {"latency": repr(self.latency), "error_rate": self.error_rate, "size": self.size, "rate": self.rate}
+
+
+def filler_text(characters: int, heading: str = "") -> str:
+    """Paragraphs of plausible prose, about `characters` long"""
+    paragraph = SENTENCE * 10 + "\n\n"
+    text = heading + paragraph * (characters // len(paragraph) + 1)
+    return text[:characters].rstrip() + "."
+
+
+class ServiceStats:
+    """Thread-safe request and injected-error counts per stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def count(self, stage: str, failed: bool = False):
+        with self._lock:
+            self.requests[stage] = self.requests.get(stage, 0) + 1
+            if failed:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "errors": dict(self.errors)}
+
+
+class FakeOpenAIServer:
+    """Local HTTP server speaking enough of the chat completions API for the pipeline
+
+    Answers each stage with text (or JSON, when a response_format schema is
+    given) of the configured size, streaming it as server-sent events when
+    asked. Point the pipeline at it with OPENAI_BASE_URL=<base_url>.
+    """
+
+    def __init__(self, profiles: Dict[str, ServiceProfile], port: int = 0, data_sources: str = "CURRENT"):
+        self.profiles = profiles
+        self.data_sources = data_sources
+        self.stats = ServiceStats()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def intent_fields(self) -> Dict:
+        return {
+            "primary_categories": ["NEWS", "SPORTS"],
+            "timeline": "Recent",
+            "depth": "Deep",
+            "recency_level": "SHORT_TERM",
+            "data_sources": self.data_sources,
+            "search_strategy": "Search recent news, updates, and current developments",
+            "mood_tone": "CASUAL",
+            "notes": "The listener wants the latest developments explained casually."
+        }
+
+    def reply_text(self, stage: str, body: Dict) -> str:
+        """What the model 'says' for a request"""
+        profile = self.profiles[stage]
+        if stage in ("intent", "intent_research"):
+            fields = self.intent_fields()
+            if stage == "intent_research":
+                fields["research"] = filler_text(profile.size, "## RESEARCH OVERVIEW\n")
+            if body.get("response_format"):
+                return json.dumps(fields)
+            return "\n".join(f"{key.upper()}: {', '.join(value) if isinstance(value, list) else value}"
+                             for key, value in fields.items())
+        if stage == "research":
+            return filler_text(profile.size, "## RESEARCH OVERVIEW\n")
+        return filler_text(profile.size)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                    return
+                messages = body.get("messages", [])
+                stage = SYSTEM_STAGES.get(messages[0]["content"] if messages else "", "script")
+                profile = fake.profiles[stage]
+                time.sleep(profile.latency.sample())
+                if profile.should_fail():
+                    fake.stats.count(stage, failed=True)
+                    self.send_json(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+                    return
+                fake.stats.count(stage)
+
+                text = fake.reply_text(stage, body)
+                usage = {
+                    "prompt_tokens": len(json.dumps(messages)) // 4,
+                    "completion_tokens": len(text) // 4,
+                    "total_tokens": (len(json.dumps(messages)) + len(text)) // 4
+                }
+                if body.get("stream"):
+                    self.stream(body, text, usage, profile)
+                    return
+                time.sleep(profile.generation_time(len(text)))
+                self.send_json(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": usage
+                })
+
+            def stream(self, body: Dict, text: str, usage: Dict, profile: ServiceProfile, piece: int = 80):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def event(choices, **extra):
+                    payload = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                               "model": body.get("model", "fake"), "choices": choices, **extra}
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                try:
+                    for start in range(0, len(text), piece):
+                        time.sleep(profile.generation_time(piece))
+                        event([{"index": 0, "delta": {"content": text[start:start + piece]}, "finish_reason": None}])
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        event([], usage=usage)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled the stream
+                    pass
+
+        return Handler
+
+
+class FakeHumeClient:
+    """Stands in for HumeClient: exposes tts.synthesize_json and returns silent audio of the configured size"""
+
+    def __init__(self, profile: ServiceProfile, stats: Optional[ServiceStats] = None):
+        self.profile = profile
+        self.stats = stats or ServiceStats()
+        self.tts = self
+
+    def synthesize_json(self, utterances, num_generations: int = 1, **kwargs):
+        characters = sum(len(utterance["text"]) for utterance in utterances)
+        time.sleep(self.profile.latency.sample() + self.profile.generation_time(characters))
+        if self.profile.should_fail():
+            self.stats.count("tts", failed=True)
+            raise RuntimeError("Injected TTS failure")
+        self.stats.count("tts")
+        audio = base64.b64encode(bytes(characters * self.profile.size)).decode("ascii")
+        return SimpleNamespace(generations=[SimpleNamespace(audio=audio) for _ in range(num_generations)])
+
+
+def install_fake_tts(profile: ServiceProfile, chunk_delay: float = None) -> ServiceStats:
+    """Make audio_generator synthesize through FakeHumeClient; chunk_delay overrides CHUNK_DELAY"""
+    import audio_generator
+    stats = ServiceStats()
+    audio_generator.create_hume_client = lambda: FakeHumeClient(profile, stats)
+    if chunk_delay is not None:
+        audio_generator.CHUNK_DELAY = chunk_delay
+    return stats
+
+
+def install_fake_web(search: ServiceProfile, crawl: ServiceProfile) -> Optional[ServiceStats]:
+    """Replace DuckDuckGo search and page fetching in duckduckgo_crawl with fakes
+
+    The researcher's own ranking, scrape limits, deduplication and output
+    still run. Returns None when the crawler cannot be imported here.
+    """
+    import web_research
+    if not web_research.load_crawler():
+        return None
+    import comprehensive_research
+    stats = ServiceStats()
+
+    async def fake_search(self, query: str, max_results: int = 10, search_strategy: str = None,
+                          recency_level: str = None):
+        await asyncio.sleep(search.latency.sample())
+        if search.should_fail():
+            stats.count("search", failed=True)
+            raise RuntimeError("Injected search failure")
+        stats.count("search")
+        slug = "-".join(query.lower().split())[:40]
+        return [{"url": f"https://site{i}.example.com/{slug}/{i}", "title": f"{query} - source {i}",
+                 "snippet": f"Latest on {query} from source {i}"} for i in range(max_results)]
+
+    async def fake_fetch(url: str, **kwargs) -> Dict:
+        await asyncio.sleep(crawl.latency.sample() + crawl.generation_time(crawl.size))
+        if crawl.should_fail():
+            stats.count("crawl", failed=True)
+            # fetch_page reports a page no tier could extract as empty content
+            return {"content": "", "tier": "failed"}
+        stats.count("crawl")
+        return {"content": filler_text(crawl.size, f"Reporting from {url}\n\n"), "tier": "http"}
+
+    comprehensive_research.ComprehensiveResearcher.search_async = fake_search
+    comprehensive_research.fetch_page = fake_fetch
+    return stats
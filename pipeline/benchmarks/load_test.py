@@ -0,0 +1,250 @@
+"""
+Load Test - Drives concurrent episodes through the whole pipeline against local stand-ins
+Reports throughput and p50/p95/p99 latency per stage, with no OpenAI, Hume or network access
+
+Episodes are submitted at once to a JobQueue with --concurrency workers,
+the way the app queues them, so queue_wait is the real time each spent
+waiting for a worker. With --max-queue below the episode count, the
+queue's backpressure turns the excess away and they are reported as
+rejected. Chat completions are answered by a local fake server,
+Hume synthesis by an in-process fake client and, with --web-research, the
+DuckDuckGo search and page fetches by fakes (the crawler's own
+dependencies must still be importable). Latencies take a number of seconds
+or a distribution: uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA.
+
+Usage (from pipeline/):
+    python benchmarks/load_test.py --episodes 20 --concurrency 4
+    python benchmarks/load_test.py --llm-latency lognormal:1.5,0.5 --llm-error-rate 0.05 --stream-audio
+    python benchmarks/load_test.py --web-research --crawl-latency uniform:0.2,2 --output after.json
+    python benchmarks/load_test.py --episodes 30 --concurrency 2 --max-queue 8
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_services import FakeOpenAIServer, ServiceProfile, install_fake_tts, install_fake_web
+
+QUERIES = [
+    "Manchester United gameweek review",
+    "AI in healthcare",
+    "relatable girl talk",
+    "H1B visa situation",
+    "the history of the printing press",
+    "this week in crypto markets"
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linearly interpolated percentile of values, p in 0-100"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3)
+    }
+
+
+def summarize_traces(traces: List[Dict], wall_time: float, rejected: int = 0) -> Dict:
+    """Throughput, outcomes and latency percentiles for the whole run and each stage
+
+    rejected counts episodes the job queue turned away, which never ran.
+    """
+    stages: Dict[str, Dict] = {}
+    for trace in traces:
+        for span in trace["spans"]:
+            stage = stages.setdefault(span["name"], {"durations": [], "statuses": {}})
+            stage["statuses"][span["status"]] = stage["statuses"].get(span["status"], 0) + 1
+            if span["duration"] is not None:
+                stage["durations"].append(span["duration"])
+        for chunk_seconds in (span.get("tts_chunk_seconds", []) for span in trace["spans"]):
+            stages.setdefault("tts_chunk", {"durations": [], "statuses": {}})["durations"].extend(chunk_seconds)
+
+    succeeded = [trace for trace in traces if trace["status"] == "ok"]
+    return {
+        "episodes": len(traces),
+        "succeeded": len(succeeded),
+        "failed": len(traces) - len(succeeded),
+        "rejected": rejected,
+        "wall_time": round(wall_time, 3),
+        "throughput_per_minute": round(len(succeeded) / wall_time * 60, 3) if wall_time else 0.0,
+        "episode": latency_summary([trace["duration"] for trace in traces]),
+        "queue_wait": latency_summary([trace["queue_wait"] for trace in traces]),
+        "stages": {name: dict(latency_summary(stage["durations"]), statuses=stage["statuses"])
+                   for name, stage in stages.items()},
+        "prompt_tokens": sum(trace.get("prompt_tokens", 0) for trace in traces),
+        "completion_tokens": sum(trace.get("completion_tokens", 0) for trace in traces),
+        "tts_characters": sum(trace.get("tts_characters", 0) for trace in traces)
+    }
+
+
+def print_report(report: Dict):
+    summary = report["summary"]
+    print(f"\n{summary['succeeded']}/{summary['episodes']} episodes succeeded in {summary['wall_time']:.1f}s "
+          f"at concurrency {report['config']['concurrency']} "
+          f"({summary['throughput_per_minute']:.2f} episodes/minute)")
+    if summary["rejected"]:
+        print(f"{summary['rejected']} more were rejected by the full job queue "
+              f"(max queue {report['config']['max_queue']})")
+    print(f"{'stage':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  statuses")
+    rows = [("episode", summary["episode"], None), ("queue_wait", summary["queue_wait"], None)]
+    rows += [(name, stage, stage["statuses"]) for name, stage in summary["stages"].items()]
+    for name, stats, statuses in rows:
+        if not stats["count"]:
+            continue
+        print(f"{name:<16}{stats['count']:>7}" +
+              "".join(f"{stats[key]:>9.2f}" for key in ("mean", "p50", "p95", "p99", "max")) +
+              (f"  {', '.join(f'{status} {count}' for status, count in statuses.items())}" if statuses else ""))
+    print(f"Tokens: {summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion; "
+          f"{summary['tts_characters']} TTS characters")
+    for service, stats in report["services"].items():
+        print(f"Fake {service}: requests {stats['requests']}, injected errors {stats['errors']}")
+
+
+def add_service_args(parser: argparse.ArgumentParser, name: str, label: str, latency: str, size: int = None,
+                     size_help: str = None, rate: float = None):
+    """--NAME-latency and --NAME-error-rate, plus --NAME-size and --NAME-rate when the fake has them"""
+    parser.add_argument(f"--{name}-latency", default=latency, help=f"{label} latency before the first byte")
+    parser.add_argument(f"--{name}-error-rate", type=float, default=0.0, help=f"Fraction of {label} calls that fail")
+    if size is not None:
+        parser.add_argument(f"--{name}-size", type=int, default=size, help=size_help)
+    if rate is not None:
+        parser.add_argument(f"--{name}-rate", type=float, default=rate,
+                            help=f"{label} output characters per second (0 for instant)")
+
+
+def profile_from_args(args, name: str) -> ServiceProfile:
+    return ServiceProfile(getattr(args, f"{name}_latency"), getattr(args, f"{name}_error_rate"),
+                          getattr(args, f"{name}_size", 0), getattr(args, f"{name}_rate", 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test of the podcast pipeline")
+    parser.add_argument("--episodes", type=int, default=12, help="Episodes to generate")
+    parser.add_argument("--concurrency", type=int, default=4, help="Job queue workers, so episodes running at once")
+    parser.add_argument("--max-queue", type=int, default=0,
+                        help="Episodes allowed to wait for a worker before the queue rejects more (0 for all of them)")
+    add_service_args(parser, "llm", "LLM", "uniform:0.2,0.8", 4000,
+                     "Characters of research and script text per reply", 2000.0)
+    add_service_args(parser, "tts", "TTS", "uniform:0.3,1.0", 64, "Bytes of audio per input character", 1500.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0,
+                        help="Seconds between TTS request starts (the pipeline's default is 3)")
+    parser.add_argument("--web-research", action="store_true", help="Ground research in a (fake) web crawl")
+    add_service_args(parser, "search", "search", "uniform:0.2,0.6")
+    add_service_args(parser, "crawl", "page fetch", "lognormal:0.5,0.6", 6000, "Characters of text per fetched page")
+    parser.add_argument("--data-sources", default="CURRENT", choices=["CURRENT", "HISTORICAL", "MIXED"],
+                        help="DATA_SOURCES the fake intent analysis answers with")
+    parser.add_argument("--intent-mode", default="text", choices=["text", "json", "fused"])
+    parser.add_argument("--stream-audio", action="store_true", help="Overlap script generation with synthesis")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the LLM reply cache enabled")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory with runs and traces")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    profiles = {stage: profile_from_args(args, "llm") for stage in ("intent", "intent_research", "research", "script")}
+    server = FakeOpenAIServer(profiles, data_sources=args.data_sources).start()
+
+    # Everything the pipeline writes goes to a scratch directory, read back below
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="podcast_load_")
+    os.chdir(workdir)
+    os.environ.update({
+        "OPENAI_BASE_URL": server.base_url,
+        "OPENAI_API_KEY": "fake",
+        "PODCAST_RUNS_DIR": os.path.join(workdir, "runs"),
+        "PODCAST_TRACE_FILE": os.path.join(workdir, "traces.jsonl"),
+        "PODCAST_WEB_RESEARCH_DIR": os.path.join(workdir, "web_research"),
+        "PODCAST_LLM_CACHE": os.path.join(workdir, "llm_cache.db") if args.use_cache else ""
+    })
+
+    import podcast_pipeline
+    import web_research
+    from job_queue import JobQueue, QueueFull
+    from stage_engine import run_sync
+
+    services = {"llm": server.stats}
+    services["tts"] = install_fake_tts(profile_from_args(args, "tts"), args.chunk_delay)
+    if args.web_research:
+        web_stats = install_fake_web(profile_from_args(args, "search"), profile_from_args(args, "crawl"))
+        if web_stats is None:
+            print("Web research unavailable here; running without it", file=sys.stderr)
+            args.web_research = False
+        else:
+            services["web"] = web_stats
+
+    jobs = JobQueue(podcast_pipeline.run_complete_pipeline, workers=args.concurrency,
+                    max_queue=args.max_queue or args.episodes)
+    print(f"Running {args.episodes} episodes at concurrency {args.concurrency} in {workdir}", file=sys.stderr)
+    started = time.time()
+    rejected = 0
+    try:
+        with contextlib.ExitStack() as quiet:
+            if not args.verbose:
+                quiet.enter_context(contextlib.redirect_stdout(quiet.enter_context(open(os.devnull, "w"))))
+            pending = []
+            for index in range(args.episodes):
+                query = f"{QUERIES[index % len(QUERIES)]} #{index}"
+                try:
+                    job_id = jobs.submit(query, use_cache=args.use_cache, stream_audio=args.stream_audio,
+                                         resume=False, intent_mode=args.intent_mode, web_research=args.web_research)
+                except QueueFull:
+                    rejected += 1
+                    continue
+                pending.append(jobs.get(job_id))
+            finished = 0
+            while pending:
+                time.sleep(0.05)
+                for job in [job for job in pending if job.done]:
+                    pending.remove(job)
+                    finished += 1
+                    print(f"[{finished}/{args.episodes - rejected}] {job.final_status}", file=sys.stderr)
+            jobs.shutdown()
+        wall_time = time.time() - started
+
+        with open(os.environ["PODCAST_TRACE_FILE"], encoding="utf-8") as f:
+            traces = [json.loads(line) for line in f if line.strip()]
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "keep", "verbose")},
+            "summary": summarize_traces(traces, wall_time, rejected),
+            "services": {name: stats.to_dict() for name, stats in services.items()}
+        }
+        print_report(report)
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {output}")
+    finally:
+        if args.web_research:
+            run_sync(web_research.close_researcher())
+        server.stop()
+        os.chdir(BENCH_DIR)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
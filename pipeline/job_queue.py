@@ -0,0 +1,169 @@
+"""
+Job Queue - Runs podcast pipelines on a fixed pool of workers
+Submitting returns a job id right away; callers poll the job for progress
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class QueueFull(Exception):
+    """Too many jobs are waiting; the caller should retry later"""
+
+
+class Job:
+    """One pipeline run and everything a status poll needs to know about it"""
+
+    def __init__(self, query: str, user_profile: str = "", options: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.query = query
+        self.user_profile = user_profile
+        self.options = options or {}
+        self.status = "queued"
+        self.messages = []
+        self.result = None
+        self.final_status = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def add_message(self, message: str):
+        self.messages.append(message)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict:
+        now = time.time()
+        return {
+            "id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "last_message": self.messages[-1] if self.messages else None,
+            "final_status": self.final_status,
+            "queued_seconds": (self.started_at or now) - self.submitted_at,
+            "run_seconds": (self.finished_at or now) - self.started_at if self.started_at else 0.0
+        }
+
+
+class JobQueue:
+    """Bounded queue of pipeline jobs served by a fixed number of worker threads
+
+    At most `workers` episodes run at once and at most `max_queue` wait;
+    submit() raises QueueFull beyond that instead of piling up requests.
+    The last `keep_finished` finished jobs stay available for polling.
+    The runner also receives queue_wait, the seconds the job spent queued.
+    """
+
+    def __init__(self, runner: Callable, workers: int = 2, max_queue: int = 8, keep_finished: int = 200):
+        self.runner = runner
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._waiting = []
+        self._lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def capacity(self) -> int:
+        """Most jobs that can be running or waiting at once"""
+        return self.workers + self._queue.maxsize
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"podcast-worker-{i + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, query: str, user_profile: str = "", **options) -> str:
+        """Queue a pipeline run and return its job id"""
+        self.start()
+        job = Job(query, user_profile, options)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self._queue.maxsize} episodes are already waiting")
+            self._jobs[job.id] = job
+            self._waiting.append(job.id)
+            self._trim()
+        print(f"Queued job {job.id} for: {query} (queue depth {self._queue.qsize()})")
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job_id: str) -> int:
+        """1-based place in line for a queued job, 0 once it has started"""
+        with self._lock:
+            return self._waiting.index(job_id) + 1 if job_id in self._waiting else 0
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return dict(job.to_dict(), position=self.position(job_id))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+            return {"queued": len(self._waiting), "running": running, "workers": self.workers,
+                    "max_queue": self._queue.maxsize}
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the jobs already queued have run"""
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond keep_finished"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._waiting.remove(job.id)
+                job.status = "running"
+                job.started_at = time.time()
+            try:
+                job.result, job.final_status = self.runner(
+                    job.query, job.user_profile, progress_callback=job.add_message,
+                    queue_wait=job.started_at - job.submitted_at, **job.options
+                )
+                job.status = "failed" if job.final_status.startswith("Pipeline failed") or \
+                    job.result.startswith("Pipeline failed") else "done"
+            except Exception as e:
+                job.result = job.final_status = f"Pipeline failed: {str(e)}"
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                print(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+
+def queue_from_env(runner: Callable) -> JobQueue:
+    """JobQueue sized by PODCAST_WORKERS and PODCAST_MAX_QUEUE"""
+    return JobQueue(
+        runner,
+        workers=int(os.getenv("PODCAST_WORKERS", "2")),
+        max_queue=int(os.getenv("PODCAST_MAX_QUEUE", "8"))
+    )
@@ -0,0 +1,104 @@
+"""
+LLM Response Cache - Reuses chat completions for identical requests
+Keyed by a hash of model, rendered messages and parameters, stored in SQLite
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Seconds a cached reply stays valid for each stage; 0 disables caching.
+# The script is sampled at temperature 0.8 and should vary between runs.
+STAGE_CACHE_TTLS = {
+    "intent": 24 * 3600,
+    "research": 12 * 3600,
+    "intent_research": 12 * 3600,
+    "script": 0
+}
+
+
+def cache_key(model: str, messages: list, params: Dict) -> str:
+    """Stable hash of everything that determines a completion"""
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Size-bounded, least-recently-used store of chat completion replies"""
+
+    def __init__(self, path: str = "llm_cache.db", max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS replies (
+                    key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    reply TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS replies_last_access ON replies (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; commits on success and always closes"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT reply FROM replies WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE replies SET last_access = ? WHERE key = ?", (now, key))
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return row[0]
+
+    def put(self, key: str, stage: str, reply: str, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO replies VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, reply, len(reply.encode("utf-8")), now, now + ttl, now)
+            )
+            conn.execute("DELETE FROM replies WHERE expires_at <= ?", (now,))
+            self._evict(conn)
+        self.stats["stores"] += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used replies until the store fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM replies").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM replies ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"LLM cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({self.hit_rate():.0%} hit rate), {self.stats['bypassed']} bypassed, "
+                f"{self.stats['stores']} stored, {self.stats['evictions']} evicted")
@@ -6,112 +6,191 @@ Takes user input and generates podcast audio through all steps automatically
 import gradio as gr
 import os
 import json
-import openai
 import asyncio
+import time
 from datetime import datetime
 from dotenv import load_dotenv
-from prompts import INTENT_ANALYSIS_PROMPT, RESEARCH_PROMPT, PODCAST_SCRIPT_PROMPT
-from audio_generator import generate_audio_from_script
+from prompts import (INTENT_SCHEMA, INTENT_RESEARCH_SCHEMA, build_intent_messages, build_intent_research_messages,
+                     build_research_messages, build_script_messages, json_response_format)
+from audio_generator import ScriptChunker, generate_audio_from_chunks, generate_audio_from_script
+from job_queue import QueueFull, queue_from_env
+from run_store import RunStore
+from telemetry import RunTrace, start_metrics_server
+from web_research import close_researcher, grounding_context, research_web
+from stage_engine import chat, chat_stream, get_llm_cache, run_stage, run_sync
 
 # Load environment variables
 load_dotenv()
 
 
-def analyze_intent(query: str, user_profile: str = "") -> dict:
-    """Step 1: Analyze user intent and extract structured data"""
+# Fields every step 1 result has, used when the analysis leaves one out
+INTENT_DEFAULTS = {
+    "primary_categories": "Unknown",
+    "timeline": "Unknown",
+    "depth": "Unknown",
+    "recency_level": "SHORT_TERM",
+    "data_sources": "HISTORICAL",
+    "search_strategy": "Unknown",
+    "mood_tone": "CASUAL",
+    "notes": "Analysis completed"
+}
+
+# OUTPUT FORMAT labels in the intent prompt and the step 1 keys they fill
+INTENT_LABELS = {
+    "PRIMARY_CATEGORIES": "primary_categories",
+    "TIMELINE": "timeline",
+    "DEPTH": "depth",
+    "RECENCY_LEVEL": "recency_level",
+    "DATA_SOURCES": "data_sources",
+    "SEARCH_STRATEGY": "search_strategy",
+    "MOOD_TONE": "mood_tone",
+    "NOTES": "notes"
+}
+
+INTENT_MODES = ("text", "json", "fused")
+
+# What a run uses for any of these options not passed explicitly, when it did not record them either
+RUN_OPTION_DEFAULTS = {"intent_mode": "text", "web_research": False, "stream_audio": False}
+
+
+def parse_intent_labels(response_text: str) -> dict:
+    """Fields from a free-text analysis written as 'PRIMARY_CATEGORIES: ...' lines
+    
+    Also accepts 'Primary Categories:' or 'Mood/Tone:' spellings and markdown bold.
+    """
+    fields = {}
+    for line in response_text.split('\n'):
+        label, separator, value = line.strip().lstrip('*-# ').partition(':')
+        label = label.strip().strip('*').upper().replace(' ', '_').replace('/', '_')
+        value = value.strip().strip('*').strip()
+        if separator and value and label in INTENT_LABELS:
+            fields.setdefault(INTENT_LABELS[label], value)
+    return fields
+
+
+def validate_intent(data: dict) -> tuple:
+    """Check structured intent against INTENT_SCHEMA; returns (valid fields, errors)"""
+    fields = {}
+    errors = []
+    for name, spec in INTENT_SCHEMA["properties"].items():
+        value = data.get(name)
+        if spec["type"] == "array":
+            allowed = spec["items"].get("enum")
+            if not isinstance(value, list) or not value or not all(isinstance(item, str) for item in value):
+                errors.append(f"{name} should be a non-empty list of strings")
+            elif allowed and any(item not in allowed for item in value):
+                errors.append(f"{name} has values outside the schema: {value}")
+            else:
+                fields[name] = ", ".join(value)
+        elif not isinstance(value, str) or not value.strip():
+            errors.append(f"{name} should be a non-empty string")
+        elif "enum" in spec and value not in spec["enum"]:
+            errors.append(f"{name} should be one of {spec['enum']}, got {value!r}")
+        else:
+            fields[name] = value.strip()
+    return fields, errors
+
+
+def parse_intent_json(response_text: str) -> dict:
+    """Fields from a structured analysis; invalid ones are left to the defaults"""
+    try:
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        print("Structured intent was not valid JSON; reading labels instead")
+        return parse_intent_labels(response_text)
+    if not isinstance(data, dict):
+        print("Structured intent was not a JSON object; using defaults")
+        return {}
+    fields, errors = validate_intent(data)
+    for error in errors:
+        print(f"Structured intent: {error}; using the default")
+    return fields
+
+
+def intent_data(query: str, user_profile: str, response_text: str, fields: dict) -> dict:
+    """Step 1 data: defaults overlaid with whatever the analysis provided"""
+    return {"query": query, "user_profile": user_profile, "raw_response": response_text,
+            **INTENT_DEFAULTS, **fields}
+
+
+async def analyze_intent_async(query: str, user_profile: str = "", use_cache: bool = True,
+                               structured: bool = False) -> dict:
+    """Step 1: Analyze user intent and extract structured data
+    
+    structured=True asks for JSON matching INTENT_SCHEMA instead of labelled text.
+    """
     print(f"Step 1: Analyzing intent for: {query}")
     
     try:
-        client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-        # Format the prompt with current date and user input
+        # Static instructions first, then the current date and user input
         current_date = datetime.now().strftime("%Y-%m-%d")
-        prompt = INTENT_ANALYSIS_PROMPT.format(current_date=current_date, user_query=query)
         
-        if user_profile:
-            prompt += f"\n\nUSER PROFILE: {user_profile}"
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": prompt}],
-            max_completion_tokens=800
-        )
-        
-        response_text = response.choices[0].message.content.strip()
+        response_text = await run_stage("intent", chat(
+            messages=build_intent_messages(query, user_profile, current_date),
+            max_completion_tokens=800,
+            stage="intent",
+            use_cache=use_cache,
+            response_format=json_response_format("podcast_intent", INTENT_SCHEMA) if structured else None
+        ))
         print("Step 1 completed: Intent analysis generated")
         
-        # Parse the response to extract structured data
-        step1_data = {
-            "query": query,
-            "user_profile": user_profile,
-            "raw_response": response_text,
-            "primary_categories": "Unknown",
-            "timeline": "Unknown", 
-            "depth": "Unknown",
-            "recency_level": "SHORT_TERM",
-            "data_sources": "HISTORICAL",
-            "search_strategy": "Unknown",
-            "mood_tone": "CASUAL",
-            "notes": "Analysis completed"
-        }
-        
-        # Try to parse structured data from response
-        try:
-            lines = response_text.split('\n')
-            for line in lines:
-                if 'Primary Categories:' in line:
-                    step1_data['primary_categories'] = line.split('Primary Categories:')[1].strip()
-                elif 'Timeline:' in line:
-                    step1_data['timeline'] = line.split('Timeline:')[1].strip()
-                elif 'Depth:' in line:
-                    step1_data['depth'] = line.split('Depth:')[1].strip()
-                elif 'Recency Level:' in line:
-                    step1_data['recency_level'] = line.split('Recency Level:')[1].strip()
-                elif 'Data Sources:' in line:
-                    step1_data['data_sources'] = line.split('Data Sources:')[1].strip()
-                elif 'Search Strategy:' in line:
-                    step1_data['search_strategy'] = line.split('Search Strategy:')[1].strip()
-                elif 'Mood/Tone:' in line:
-                    step1_data['mood_tone'] = line.split('Mood/Tone:')[1].strip()
-                elif 'Notes:' in line:
-                    step1_data['notes'] = line.split('Notes:')[1].strip()
-        except:
-            pass  # Use defaults if parsing fails
-        
-        return step1_data
+        fields = parse_intent_json(response_text) if structured else parse_intent_labels(response_text)
+        return intent_data(query, user_profile, response_text, fields)
         
     except Exception as e:
         print(f"Step 1 failed: {str(e)}")
         return {"error": f"Intent analysis failed: {str(e)}"}
 
 
-def conduct_research(step1_data: dict) -> str:
-    """Step 2: Conduct LLM-based research"""
-    print("Step 2: Conducting research...")
+async def analyze_and_research_async(query: str, user_profile: str = "", use_cache: bool = True) -> tuple:
+    """Steps 1 and 2 in one structured call; returns (step1_data, research_result)
+    
+    On failure step1_data holds an "error" key and research_result is None.
+    """
+    print(f"Step 1+2: Analyzing intent and researching in one call for: {query}")
     
     try:
-        client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-        # Format the research prompt with all Step 1 data
-        research_prompt = RESEARCH_PROMPT.format(
-            query=step1_data['query'],
-            primary_categories=step1_data['primary_categories'],
-            timeline=step1_data['timeline'],
-            depth=step1_data['depth'],
-            recency_level=step1_data['recency_level'],
-            data_sources=step1_data['data_sources'],
-            search_strategy=step1_data['search_strategy'],
-            notes=step1_data['notes'],
-            mood_tone=step1_data['mood_tone']
-        )
+        current_date = datetime.now().strftime("%Y-%m-%d")
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": research_prompt}],
-            max_completion_tokens=2000
-        )
+        response_text = await run_stage("intent_research", chat(
+            messages=build_intent_research_messages(query, user_profile, current_date),
+            max_completion_tokens=2800,
+            stage="intent_research",
+            use_cache=use_cache,
+            response_format=json_response_format("podcast_intent_research", INTENT_RESEARCH_SCHEMA)
+        ))
+        data = json.loads(response_text)
+        research_result = data.get("research") if isinstance(data, dict) else None
+        if not isinstance(research_result, str) or not research_result.strip():
+            raise ValueError("response has no research report")
+        
+        fields, errors = validate_intent(data)
+        for error in errors:
+            print(f"Structured intent: {error}; using the default")
+        print("Step 1+2 completed: Intent analysis and research generated")
+        return intent_data(query, user_profile, response_text, fields), research_result.strip()
         
-        research_result = response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Step 1+2 failed: {str(e)}")
+        return {"error": f"Intent analysis and research failed: {str(e)}"}, None
+
+
+async def conduct_research_async(step1_data: dict, use_cache: bool = True, web_context: str = None) -> str:
+    """Step 2: Conduct LLM-based research
+    
+    web_context is text from a web crawl to ground the research in.
+    """
+    print("Step 2: Conducting research...")
+    
+    try:
+        # Static instructions first, then all Step 1 data and any web sources
+        retrieved_date = datetime.now().strftime("%Y-%m-%d")
+        research_result = await run_stage("research", chat(
+            messages=build_research_messages(step1_data, web_context, retrieved_date),
+            max_completion_tokens=2000,
+            stage="research",
+            use_cache=use_cache
+        ))
         print("Step 2 completed: Research conducted")
         
         return research_result
@@ -121,30 +200,63 @@ def conduct_research(step1_data: dict) -> str:
         return f"Research failed: {str(e)}"
 
 
-def generate_podcast_script(step1_data: dict, research_result: str) -> str:
+async def web_research_async(query: str, trace: RunTrace):
+    """Crawl the web for the raw query, traced as its own span; returns a ResearchResult or None
+    
+    Started alongside intent analysis, so it is cancelled rather than awaited
+    when the intent says web data is not needed.
+    """
+    with trace.span("web_research") as span:
+        try:
+            result = await run_stage("web_research", research_web(query))
+        except asyncio.CancelledError:
+            span.status = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Web research failed: {str(e)}")
+            span.status = "failed"
+            return None
+        if result is None:
+            span.status = "failed"
+        else:
+            span.set("web_sources", result['total_sources'])
+        return result
+
+
+def data_sources_level(value) -> str:
+    """DATA_SOURCES as HISTORICAL, CURRENT or MIXED, tolerating case, brackets and extra text around it"""
+    text = str(value).upper()
+    # A reply naming several levels needs more than historical knowledge
+    for level in ("MIXED", "CURRENT", "HISTORICAL"):
+        if level in text:
+            return level
+    return text.strip()
+
+
+async def web_grounding(web_task: asyncio.Task, step1_data: dict) -> str:
+    """Web context for the research step once intent is known, or None
+    
+    Historical topics need no web data, so their crawl is cancelled unused.
+    """
+    if data_sources_level(step1_data['data_sources']) == "HISTORICAL":
+        web_task.cancel()
+        print("Intent needs only historical knowledge; cancelled web research")
+        return None
+    result = await web_task
+    return await grounding_context(result, step1_data) if result else None
+
+
+async def generate_podcast_script_async(step1_data: dict, research_result: str) -> str:
     """Step 3: Generate podcast script"""
     print("Step 3: Generating podcast script...")
     
     try:
-        client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-        # Format the script prompt with all context
-        script_prompt = PODCAST_SCRIPT_PROMPT.format(
-            query=step1_data['query'],
-            primary_categories=step1_data['primary_categories'],
-            timeline=step1_data['timeline'],
-            mood_tone=step1_data['mood_tone'],
-            research_content=research_result
-        )
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": script_prompt}],
+        script = await run_stage("script", chat(
+            messages=build_script_messages(step1_data, research_result),
             max_completion_tokens=15000,
-            temperature=0.8
-        )
-        
-        script = response.choices[0].message.content.strip()
+            temperature=0.8,
+            stage="script"
+        ))
         
         # Clean up script content
         script = clean_script_content(script)
@@ -170,18 +282,37 @@ def clean_script_content(script: str) -> str:
     return script
 
 
-def generate_audio(script: str, query: str) -> str:
+def analyze_intent(query: str, user_profile: str = "", use_cache: bool = True, structured: bool = False) -> dict:
+    """Step 1 for synchronous callers"""
+    return run_sync(analyze_intent_async(query, user_profile, use_cache, structured))
+
+
+def conduct_research(step1_data: dict, use_cache: bool = True, web_context: str = None) -> str:
+    """Step 2 for synchronous callers"""
+    return run_sync(conduct_research_async(step1_data, use_cache, web_context))
+
+
+def generate_podcast_script(step1_data: dict, research_result: str) -> str:
+    """Step 3 for synchronous callers"""
+    return run_sync(generate_podcast_script_async(step1_data, research_result))
+
+
+def audio_filename_for(query: str) -> str:
+    """Create safe filename"""
+    safe_query = query.replace(' ', '_').replace('?', '').replace('!', '')[:30]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"podcast_audio_{safe_query}_{timestamp}.wav"
+
+
+def generate_audio(script: str, query: str, chunk_dir: str = None) -> str:
     """Step 4: Generate audio from script"""
     print("Step 4: Generating audio...")
     
     try:
-        # Create safe filename
-        safe_query = query.replace(' ', '_').replace('?', '').replace('!', '')[:30]
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        audio_filename = f"podcast_audio_{safe_query}_{timestamp}.wav"
+        audio_filename = audio_filename_for(query)
         
         # Generate audio
-        result = generate_audio_from_script(script, audio_filename)
+        result = generate_audio_from_script(script, audio_filename, chunk_dir)
         
         if result:
             print(f"Step 4 completed: Audio generated - {audio_filename}")
@@ -195,8 +326,106 @@ def generate_audio(script: str, query: str) -> str:
         return None
 
 
-def run_complete_pipeline(query: str, user_profile: str = "", progress_callback=None) -> tuple:
-    """Run the complete podcast generation pipeline with progress updates"""
+async def replay_script_chunks(script: str):
+    """A finished script as the chunks ScriptChunker cut while it streamed"""
+    chunker = ScriptChunker()
+    for chunk in chunker.feed(script) + chunker.flush():
+        yield chunk
+
+
+async def generate_audio_async(script: str, query: str, chunk_dir: str = None, streamed: bool = False) -> str:
+    """Step 4 without blocking the event loop; Hume synthesis runs in a worker thread
+    
+    streamed=True chunks the script as generate_script_and_audio_async did.
+    """
+    try:
+        if streamed:
+            audio_filename = await run_stage("audio", generate_audio_from_chunks(
+                replay_script_chunks(script), audio_filename_for(query), chunk_dir
+            ))
+            print(f"Step 4 completed: Audio generated - {audio_filename}" if audio_filename
+                  else "Step 4 failed: Audio generation failed")
+            return audio_filename
+        return await run_stage("audio", asyncio.to_thread(generate_audio, script, query, chunk_dir))
+    except Exception as e:
+        print(f"Step 4 failed: {str(e)}")
+        return None
+
+
+async def generate_script_and_audio_async(step1_data: dict, research_result: str, query: str,
+                                          chunk_dir: str = None) -> tuple:
+    """Steps 3 and 4 overlapped: stream the script and synthesize each chunk as soon as it is complete
+    
+    Returns (script, audio_filename); the script is the same cleaned text
+    generate_podcast_script returns, and audio_filename is None if
+    synthesis failed.
+    """
+    print("Step 3+4: Streaming podcast script into audio generation...")
+    chunk_queue = asyncio.Queue()
+    
+    async def queued_chunks():
+        while True:
+            chunk = await chunk_queue.get()
+            if chunk is None:
+                return
+            yield chunk
+    
+    audio_task = asyncio.create_task(generate_audio_from_chunks(queued_chunks(), audio_filename_for(query), chunk_dir))
+    chunker = ScriptChunker()
+    parts = []
+    try:
+        async for text in chat_stream(
+            messages=build_script_messages(step1_data, research_result),
+            max_completion_tokens=15000,
+            temperature=0.8,
+            stage="script"
+        ):
+            # Cleaning is character-for-character, so each piece can be cleaned on its own
+            text = clean_script_content(text)
+            parts.append(text)
+            for chunk in chunker.feed(text):
+                chunk_queue.put_nowait(chunk)
+        for chunk in chunker.flush():
+            chunk_queue.put_nowait(chunk)
+        chunk_queue.put_nowait(None)
+        
+        script = ''.join(parts).strip()
+        print(f"Step 3 completed: Script generated ({len(script)} characters)")
+        audio_filename = await audio_task
+    except BaseException:
+        audio_task.cancel()
+        raise
+    
+    if audio_filename:
+        print(f"Step 4 completed: Audio generated - {audio_filename}")
+    else:
+        print("Step 4 failed: Audio generation failed")
+    return script, audio_filename
+
+
+async def run_pipeline_async(query: str, user_profile: str = "", progress_callback=None,
+                             use_cache: bool = True, stream_audio: bool = None,
+                             run_id: str = None, rerun_stage: str = None, resume: bool = True,
+                             queue_wait: float = 0.0, intent_mode: str = None,
+                             web_research: bool = None) -> tuple:
+    """Run the complete podcast generation pipeline with progress updates
+    
+    use_cache=False forces fresh intent analysis and research.
+    intent_mode picks how intent is analyzed: "text" (labelled lines), "json"
+    (schema-validated structured output) or "fused" (intent and research from
+    one structured call, saving a round trip).
+    web_research=True crawls the web for the query while intent is analyzed
+    and grounds the research in what it finds, unless the intent only needs
+    historical knowledge (not available with the fused intent mode).
+    stream_audio=True overlaps script generation with audio synthesis.
+    These three options are recorded with a new run; a resumed or rerun run
+    uses its recorded values for any left as None (see RUN_OPTION_DEFAULTS).
+    Each stage's output is checkpointed under a run id. A retry of the same
+    query and profile resumes the newest unfinished run (unless resume=False);
+    run_id picks a run explicitly and rerun_stage runs that stage and the
+    ones after it again. Stage timings, tokens and TTS usage are traced
+    (see telemetry.py); queue_wait is how long the episode waited for a worker.
+    """
     print(f"Starting Complete Podcast Pipeline")
     print(f"Query: {query}")
     print(f"User Profile: {user_profile}")
@@ -213,46 +442,152 @@ def run_complete_pipeline(query: str, user_profile: str = "", progress_callback=
         if progress_callback:
             progress_callback(message)
     
+    if intent_mode is not None and intent_mode not in INTENT_MODES:
+        return f"Pipeline failed: unknown intent mode {intent_mode!r}", "Pipeline failed"
+    given = {"intent_mode": intent_mode, "web_research": web_research, "stream_audio": stream_audio}
+    
+    run = None
+    web_task = None
+    trace = RunTrace(run_id, query, queue_wait)
+    outcome = "failed"
     try:
-        # Step 1: Intent Analysis
-        update_status("Step 1/4: Analyzing user intent...")
-        step1_data = analyze_intent(query, user_profile)
-        if "error" in step1_data:
-            return f"Pipeline failed at Step 1: {step1_data['error']}", current_status
-        
-        update_status("Step 1 completed: Intent analysis generated")
-        
-        # Step 2: Research
-        update_status("Step 2/4: Conducting research...")
-        research_result = conduct_research(step1_data)
-        if research_result.startswith("Research failed"):
-            return f"Pipeline failed at Step 2: {research_result}", current_status
-        
-        update_status("Step 2 completed: Research conducted")
-        
-        # Step 3: Script Generation
-        update_status("Step 3/4: Generating podcast script...")
-        script = generate_podcast_script(step1_data, research_result)
-        if script.startswith("Script generation failed"):
-            return f"Pipeline failed at Step 3: {script}", current_status
-        
-        update_status(f"Step 3 completed: Script generated ({len(script)} characters)")
-        
-        # Step 4: Audio Generation
-        update_status("Step 4/4: Generating audio...")
-        audio_filename = generate_audio(script, query)
-        if not audio_filename:
-            return f"Pipeline failed at Step 4: Audio generation failed", current_status
-        
-        update_status("Step 4 completed: Audio generated")
+        run = runs.open_run(query, user_profile, run_id, resume,
+                            {name: RUN_OPTION_DEFAULTS[name] if value is None else value
+                             for name, value in given.items()})
+        trace.run_id = run.id
+        # Options not given follow how the run was started
+        options = {name: run.options.get(name, RUN_OPTION_DEFAULTS[name]) if value is None else value
+                   for name, value in given.items()}
+        intent_mode, web_research, stream_audio = (options["intent_mode"], options["web_research"],
+                                                   options["stream_audio"])
+        if rerun_stage:
+            run.invalidate_from(rerun_stage)
+        update_status(f"Run {run.id}: resuming at {run.first_incomplete_stage()}"
+                      if run.manifest["stages"] else f"Run {run.id}: starting")
+        
+        if web_research and intent_mode != "fused" and "research" not in run.manifest["stages"]:
+            # Speculative: crawl the raw query now so the crawl overlaps intent analysis
+            web_task = asyncio.create_task(web_research_async(query, trace))
+        
+        if intent_mode == "fused" and "intent" not in run.manifest["stages"]:
+            # Steps 1 and 2 together: one structured call returns the intent fields and the research
+            with trace.span("intent+research") as span:
+                update_status("Step 1-2/4: Analyzing intent and researching in one call...")
+                step1_data, research_result = await analyze_and_research_async(query, user_profile, use_cache)
+                if "error" in step1_data:
+                    span.status = "failed"
+                    return f"Pipeline failed at Step 1: {step1_data['error']}", current_status
+                run.save("intent", step1_data)
+                run.save("research", research_result)
+                
+                update_status("Step 2 completed: Intent analyzed and research conducted")
+        else:
+            # Step 1: Intent Analysis
+            with trace.span("intent") as span:
+                step1_data = run.load("intent")
+                if step1_data is not None:
+                    span.status = "restored"
+                    update_status("Step 1 restored from checkpoint")
+                else:
+                    update_status("Step 1/4: Analyzing user intent...")
+                    step1_data = await analyze_intent_async(query, user_profile, use_cache,
+                                                            structured=intent_mode == "json")
+                    if "error" in step1_data:
+                        span.status = "failed"
+                        return f"Pipeline failed at Step 1: {step1_data['error']}", current_status
+                    run.save("intent", step1_data)
+                    
+                    update_status("Step 1 completed: Intent analysis generated")
+            
+            # Step 2: Research
+            with trace.span("research") as span:
+                research_result = run.load("research")
+                if research_result is not None:
+                    span.status = "restored"
+                    update_status("Step 2 restored from checkpoint")
+                else:
+                    web_context = None
+                    if web_task is not None:
+                        update_status("Step 2/4: Collecting web research...")
+                        wait_started = time.time()
+                        web_context = await web_grounding(web_task, step1_data)
+                        # How much of the crawl was left on the critical path after intent analysis
+                        span.set("web_wait_seconds", time.time() - wait_started)
+                    update_status("Step 2/4: Conducting research...")
+                    research_result = await conduct_research_async(step1_data, use_cache, web_context)
+                    if research_result.startswith("Research failed"):
+                        span.status = "failed"
+                        return f"Pipeline failed at Step 2: {research_result}", current_status
+                    run.save("research", research_result)
+                    
+                    update_status("Step 2 completed: Research conducted")
+        
+        script = run.load("script")
+        audio_filename = run.load("audio")
+        
+        if script is None and stream_audio:
+            # Steps 3 and 4 together: audio starts while the script is still being written
+            with trace.span("script+audio") as span:
+                update_status("Step 3-4/4: Streaming script into audio generation...")
+                try:
+                    script, audio_filename = await run_stage(
+                        "audio", generate_script_and_audio_async(step1_data, research_result, query, run.chunk_dir)
+                    )
+                except Exception as e:
+                    span.status = "failed"
+                    return f"Pipeline failed at Step 3: Script generation failed: {str(e)}", current_status
+                run.save("script", script)
+                span.set("script_characters", len(script))
+                if not audio_filename:
+                    span.status = "failed"
+                    return f"Pipeline failed at Step 4: Audio generation failed", current_status
+                run.save("audio", audio_filename)
+                
+                update_status(f"Step 4 completed: Audio generated from {len(script)} characters of script")
+        else:
+            # Step 3: Script Generation
+            with trace.span("script") as span:
+                if script is not None:
+                    span.status = "restored"
+                    update_status("Step 3 restored from checkpoint")
+                else:
+                    update_status("Step 3/4: Generating podcast script...")
+                    script = await generate_podcast_script_async(step1_data, research_result)
+                    if script.startswith("Script generation failed"):
+                        span.status = "failed"
+                        return f"Pipeline failed at Step 3: {script}", current_status
+                    run.save("script", script)
+                    span.set("script_characters", len(script))
+                    
+                    update_status(f"Step 3 completed: Script generated ({len(script)} characters)")
+            
+            # Step 4: Audio Generation
+            with trace.span("audio") as span:
+                if audio_filename is not None:
+                    span.status = "restored"
+                    update_status("Step 4 restored from checkpoint")
+                else:
+                    update_status("Step 4/4: Generating audio...")
+                    # A streamed run's script is cut the same way again, so its checkpointed chunks match
+                    audio_filename = await generate_audio_async(script, query, run.chunk_dir, streamed=stream_audio)
+                    if not audio_filename:
+                        span.status = "failed"
+                        return f"Pipeline failed at Step 4: Audio generation failed", current_status
+                    run.save("audio", audio_filename)
+                    
+                    update_status("Step 4 completed: Audio generated")
         
         # Success!
+        outcome = "ok"
         update_status("Pipeline completed successfully!")
         print(f"Audio file: {audio_filename}")
+        if get_llm_cache():
+            print(get_llm_cache().summary())
         
         result = f"""## Podcast Generated Successfully!
 
 **Query:** {query}
+**Run ID:** `{run.id}`
 **Audio File:** `{audio_filename}`
 **Script Length:** {len(script)} characters
 
@@ -269,6 +604,32 @@ def run_complete_pipeline(query: str, user_profile: str = "", progress_callback=
         error_msg = f"Pipeline failed: {str(e)}"
         print(error_msg)
         return error_msg, f"Pipeline failed: {str(e)}"
+    
+    finally:
+        if web_task is not None and not web_task.done():
+            web_task.cancel()
+        if run is not None:
+            runs.release(run)
+        trace.finish(outcome)
+        print(trace.summary())
+
+
+def run_complete_pipeline(query: str, user_profile: str = "", progress_callback=None,
+                          use_cache: bool = True, stream_audio: bool = None,
+                          run_id: str = None, rerun_stage: str = None, resume: bool = True,
+                          queue_wait: float = 0.0, intent_mode: str = None, web_research: bool = None) -> tuple:
+    """Synchronous entry point for the Gradio handler; runs the pipeline on the shared event loop"""
+    return run_sync(run_pipeline_async(query, user_profile, progress_callback, use_cache, stream_audio,
+                                       run_id, rerun_stage, resume, queue_wait, intent_mode, web_research))
+
+
+# Stage checkpoints, so a failed episode resumes instead of starting over
+runs = RunStore(os.getenv("PODCAST_RUNS_DIR", "runs"))
+
+
+# Episodes run on a fixed worker pool; the UI polls their status
+jobs = queue_from_env(run_complete_pipeline)
+JOB_POLL_INTERVAL = 1.0
 
 
 # Create Gradio interface
@@ -290,6 +651,21 @@ with gr.Blocks(title="Podcast Pipeline") as demo:
                 lines=2
             )
             
+            stream_audio_input = gr.Checkbox(
+                label="Start audio while the script is being written (faster)",
+                value=False
+            )
+            
+            fused_intent_input = gr.Checkbox(
+                label="Analyze intent and research in one call (faster)",
+                value=False
+            )
+            
+            web_research_input = gr.Checkbox(
+                label="Ground research in a live web search (fresher facts)",
+                value=False
+            )
+            
             generate_btn = gr.Button("Generate Podcast", variant="primary", size="lg")
         
         with gr.Column():
@@ -299,26 +675,57 @@ with gr.Blocks(title="Podcast Pipeline") as demo:
     with gr.Row():
         output_display = gr.Markdown()
     
-    # Event handler with real-time updates
-    def generate_podcast(query, user_profile, progress=gr.Progress()):
+    # Event handler with real-time updates: submit a job, then poll it until it finishes
+    # Async, so a waiting tab holds no Gradio worker thread between polls
+    async def generate_podcast(query, user_profile, stream_audio=False, fused_intent=False, web_research=False):
         if not query.strip():
-            return "Please enter a query for your podcast.", "### Pipeline Status\nNo query provided"
-        
-        progress(0, desc="Starting pipeline...")
+            yield "Please enter a query for your podcast.", "### Pipeline Status\nNo query provided"
+            return
         
-        # Run the complete pipeline with progress updates
-        result, final_status = run_complete_pipeline(query, user_profile)
-        
-        return result, f"### Pipeline Status\n{final_status}"
+        try:
+            job_id = jobs.submit(query, user_profile, stream_audio=stream_audio,
+                                 intent_mode="fused" if fused_intent else "text", web_research=web_research)
+        except QueueFull:
+            yield "", "### Pipeline Status\nThe server is busy generating other episodes. Please try again in a few minutes."
+            return
+        
+        # Poll the Job itself, which stays valid even after the queue trims it from its history
+        job = jobs.get(job_id)
+        if job is None:
+            yield "", f"### Pipeline Status\nJob `{job_id}` is no longer available. Please try again."
+            return
+        
+        last_update = None
+        while True:
+            if job.done:
+                yield job.result, f"### Pipeline Status\n{job.final_status}"
+                return
+            position = jobs.position(job_id)
+            if position:
+                update = f"Waiting in queue (position {position})..."
+            else:
+                update = (job.messages[-1] if job.messages else None) or "Starting pipeline..."
+            if update != last_update:
+                last_update = update
+                yield "", f"### Pipeline Status\nJob `{job_id}`: {update}"
+            await asyncio.sleep(JOB_POLL_INTERVAL)
     
+    # Enough handlers to watch every job the queue can hold; more clicks wait in Gradio's queue
     generate_btn.click(
         generate_podcast,
-        inputs=[query_input, user_profile_input],
-        outputs=[output_display, status_display]
+        inputs=[query_input, user_profile_input, stream_audio_input, fused_intent_input, web_research_input],
+        outputs=[output_display, status_display],
+        concurrency_limit=jobs.capacity
     )
 
 
 if __name__ == "__main__":
     print("Starting Complete Podcast Pipeline...")
     print("Make sure you have OPENAI_API_KEY and HUME_API_KEY in your .env file")
-    demo.launch(server_name="0.0.0.0", server_port=7860)
\ No newline at end of file
+    if os.getenv("PODCAST_METRICS_PORT", "9464"):
+        start_metrics_server(int(os.getenv("PODCAST_METRICS_PORT", "9464")))
+    try:
+        demo.launch(server_name="0.0.0.0", server_port=7860)
+    finally:
+        # Shut down the crawler's browsers and connections on the loop they belong to
+        run_sync(close_researcher())
\ No newline at end of file
@@ -2,12 +2,27 @@
 Prompts package for podcast content generation
 """
 
-from .intent_analysis import INTENT_ANALYSIS_PROMPT
-from .research import RESEARCH_PROMPT
-from .podcast_script import PODCAST_SCRIPT_PROMPT
+from .intent_analysis import INTENT_ANALYSIS_SYSTEM, INTENT_ANALYSIS_INPUT, INTENT_SCHEMA
+from .intent_research import INTENT_RESEARCH_SYSTEM, INTENT_RESEARCH_SCHEMA
+from .research import RESEARCH_SYSTEM, RESEARCH_INPUT, RESEARCH_GROUNDING_INPUT
+from .podcast_script import PODCAST_SCRIPT_SYSTEM, PODCAST_SCRIPT_INPUT
+from .layout import (build_intent_messages, build_intent_research_messages, build_research_messages,
+                     build_script_messages, json_response_format)
 
 __all__ = [
-    'INTENT_ANALYSIS_PROMPT',
-    'RESEARCH_PROMPT',
-    'PODCAST_SCRIPT_PROMPT'
+    'INTENT_ANALYSIS_SYSTEM',
+    'INTENT_ANALYSIS_INPUT',
+    'INTENT_SCHEMA',
+    'INTENT_RESEARCH_SYSTEM',
+    'INTENT_RESEARCH_SCHEMA',
+    'RESEARCH_SYSTEM',
+    'RESEARCH_INPUT',
+    'RESEARCH_GROUNDING_INPUT',
+    'PODCAST_SCRIPT_SYSTEM',
+    'PODCAST_SCRIPT_INPUT',
+    'build_intent_messages',
+    'build_intent_research_messages',
+    'build_research_messages',
+    'build_script_messages',
+    'json_response_format'
 ]
\ No newline at end of file
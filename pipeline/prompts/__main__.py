@@ -0,0 +1,8 @@
+"""
+Check that every prompt's static prefix is byte-identical across requests
+"""
+
+from .layout import check_static_prefixes
+
+for name, size in check_static_prefixes().items():
+    print(f"{name}: static prefix of {size} bytes is identical across requests")
@@ -2,7 +2,10 @@
 Intent analysis prompt for podcast content creation
 """
 
-INTENT_ANALYSIS_PROMPT = """You are an expert content analyst. Today's date is {current_date}.
+# Static instructions and examples, sent unchanged as the system message so
+# the provider can cache them; the date and query go in INTENT_ANALYSIS_INPUT.
+# The fused intent+research prompt reuses these without the labelled-line format
+INTENT_ANALYSIS_INSTRUCTIONS = """You are an expert content analyst. Today's date is given with each query.
 
 Analyze the user's query and provide a structured response for podcast content creation. ALWAYS provide specific categories - never use "UNKNOWN".
 
@@ -113,7 +116,9 @@ DATA_SOURCES: HISTORICAL
 SEARCH_STRATEGY: Use AI knowledge for humorous dating stories and comedic content
 MOOD_TONE: FUNNY
 NOTES: Light-hearted dating mishaps, humorous relationship stories, comedic takes on modern dating, and entertaining anecdotes that make listeners laugh while being relatable.
+"""
 
+INTENT_ANALYSIS_SYSTEM = INTENT_ANALYSIS_INSTRUCTIONS + """
 OUTPUT FORMAT:
 PRIMARY_CATEGORIES: [list categories]
 TIMELINE: [Evergreen/Recent/Mixed]
@@ -123,7 +128,36 @@ DATA_SOURCES: [HISTORICAL/CURRENT/MIXED]
 SEARCH_STRATEGY: [brief description of search approach]
 MOOD_TONE: [FUNNY/SERIOUS/RELATABLE/INSPIRATIONAL/SARCASTIC/CASUAL/DRAMATIC/MIXED]
 NOTES: [comprehensive context about what the user is asking for, including key topics, angles, and specific information that would be valuable for content creation]
+"""
+
+INTENT_ANALYSIS_INPUT = """Today's date is {current_date}.
 
 Now analyze the following query:
-Query: {user_query}
-"""
+Query: {user_query}"""
+
+
+INTENT_CATEGORIES = [
+    "NEWS", "EDUCATIONAL", "POLITICS", "BUSINESS", "TECHNOLOGY", "ECONOMICS", "SOCIAL_ISSUES", "LEGAL",
+    "PERSONAL", "ANALYTICAL", "PRACTICAL", "CONTROVERSIAL", "INFORMATIONAL", "ENTERTAINMENT", "SELF-HELP",
+    "HEALTH", "SPORTS", "SCIENCE", "ARTS", "ENVIRONMENT", "PSYCHOLOGY", "HISTORY", "PHILOSOPHY", "CRIME",
+    "FINANCE", "RELATABLE"
+]
+
+# JSON schema for structured intent output; property names are the step 1 data keys
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "primary_categories": {"type": "array", "items": {"type": "string", "enum": INTENT_CATEGORIES}},
+        "timeline": {"type": "string", "enum": ["Evergreen", "Recent", "Mixed"]},
+        "depth": {"type": "string", "enum": ["Surface", "Deep", "Mixed"]},
+        "recency_level": {"type": "string", "enum": ["IMMEDIATE", "SHORT_TERM", "LONG_TERM", "ONGOING"]},
+        "data_sources": {"type": "string", "enum": ["HISTORICAL", "CURRENT", "MIXED"]},
+        "search_strategy": {"type": "string"},
+        "mood_tone": {"type": "string", "enum": ["FUNNY", "SERIOUS", "RELATABLE", "INSPIRATIONAL", "SARCASTIC",
+                                                 "CASUAL", "DRAMATIC", "MIXED"]},
+        "notes": {"type": "string"}
+    },
+    "required": ["primary_categories", "timeline", "depth", "recency_level", "data_sources",
+                 "search_strategy", "mood_tone", "notes"],
+    "additionalProperties": False
+}
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Combined intent analysis and research prompt, answered in one structured call
+"""
+
+from .intent_analysis import INTENT_ANALYSIS_INSTRUCTIONS, INTENT_SCHEMA
+from .research import RESEARCH_SYSTEM
+
+# Starts with the intent instructions so it shares their cached prefix, but
+# asks only for JSON: the labelled-line output format is left out
+INTENT_RESEARCH_SYSTEM = INTENT_ANALYSIS_INSTRUCTIONS + """
+After the analysis, act as the researcher for the episode. Treat the fields you just determined as the research context and follow these instructions:
+""" + RESEARCH_SYSTEM + """
+RESPONSE FORMAT:
+Respond with a single JSON object and nothing else. The examples above show the analysis fields as labelled lines; here each one is a JSON key instead:
+- "primary_categories": array of categories from INTENT CATEGORIES
+- "timeline": "Evergreen", "Recent" or "Mixed"
+- "depth": "Surface", "Deep" or "Mixed"
+- "recency_level": "IMMEDIATE", "SHORT_TERM", "LONG_TERM" or "ONGOING"
+- "data_sources": "HISTORICAL", "CURRENT" or "MIXED"
+- "search_strategy": brief description of search approach
+- "mood_tone": "FUNNY", "SERIOUS", "RELATABLE", "INSPIRATIONAL", "SARCASTIC", "CASUAL", "DRAMATIC" or "MIXED"
+- "notes": comprehensive context about what the user is asking for, including key topics, angles, and specific information that would be valuable for content creation
+- "research": the complete research report in the format above, as one string"""
+
+INTENT_RESEARCH_SCHEMA = {
+    **INTENT_SCHEMA,
+    "properties": {**INTENT_SCHEMA["properties"], "research": {"type": "string"}},
+    "required": INTENT_SCHEMA["required"] + ["research"]
+}
\ No newline at end of file
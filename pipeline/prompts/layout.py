@@ -0,0 +1,109 @@
+"""
+Message layout for the pipeline prompts: a static system message followed by a dynamic user message
+
+The system message never changes between requests, so it forms a stable
+prefix the provider can cache. tests/test_prompt_layout.py checks that;
+`python -m prompts` from the pipeline directory prints the prefix sizes.
+"""
+
+from .intent_analysis import INTENT_ANALYSIS_SYSTEM, INTENT_ANALYSIS_INPUT
+from .intent_research import INTENT_RESEARCH_SYSTEM
+from .research import RESEARCH_SYSTEM, RESEARCH_INPUT, RESEARCH_GROUNDING_INPUT
+from .podcast_script import PODCAST_SCRIPT_SYSTEM, PODCAST_SCRIPT_INPUT
+
+
+def build_intent_messages(query: str, user_profile: str, current_date: str) -> list:
+    user_message = INTENT_ANALYSIS_INPUT.format(current_date=current_date, user_query=query)
+    if user_profile:
+        user_message += f"\n\nUSER PROFILE: {user_profile}"
+    return [
+        {"role": "system", "content": INTENT_ANALYSIS_SYSTEM},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def build_intent_research_messages(query: str, user_profile: str, current_date: str) -> list:
+    """Intent and research in one request; the user message is the same as for intent alone"""
+    user_message = build_intent_messages(query, user_profile, current_date)[1]
+    return [{"role": "system", "content": INTENT_RESEARCH_SYSTEM}, user_message]
+
+
+def json_response_format(name: str, schema: dict) -> dict:
+    """response_format that makes the model answer with JSON matching schema"""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def build_research_messages(step1_data: dict, web_context: str = None, retrieved_date: str = None) -> list:
+    """Research request; web_context is crawled source text to ground it in, placed after the intent fields"""
+    user_message = RESEARCH_INPUT.format(
+        query=step1_data['query'],
+        primary_categories=step1_data['primary_categories'],
+        timeline=step1_data['timeline'],
+        depth=step1_data['depth'],
+        recency_level=step1_data['recency_level'],
+        data_sources=step1_data['data_sources'],
+        search_strategy=step1_data['search_strategy'],
+        notes=step1_data['notes'],
+        mood_tone=step1_data['mood_tone']
+    )
+    if web_context:
+        user_message += RESEARCH_GROUNDING_INPUT.format(retrieved_date=retrieved_date, web_context=web_context)
+    return [
+        {"role": "system", "content": RESEARCH_SYSTEM},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def build_script_messages(step1_data: dict, research_result: str) -> list:
+    user_message = PODCAST_SCRIPT_INPUT.format(
+        query=step1_data['query'],
+        primary_categories=step1_data['primary_categories'],
+        timeline=step1_data['timeline'],
+        mood_tone=step1_data['mood_tone'],
+        research_content=research_result
+    )
+    return [
+        {"role": "system", "content": PODCAST_SCRIPT_SYSTEM},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def check_static_prefixes() -> dict:
+    """Build every prompt for two unrelated requests and confirm the system messages are byte-identical
+
+    Returns the size in bytes of each static prefix; raises ValueError if a
+    prefix varies with the request or still contains a placeholder.
+    """
+    requests = [
+        ("H1B visa situation", "23 year old software engineer", "2024-01-15",
+         {"primary_categories": "NEWS, POLITICS", "timeline": "Recent", "depth": "Deep",
+          "recency_level": "SHORT_TERM", "data_sources": "CURRENT", "search_strategy": "Search policy updates",
+          "mood_tone": "SERIOUS", "notes": "Policy changes"}, "Research about visas"),
+        ("funny dating disasters", "", "2025-06-30",
+         {"primary_categories": "ENTERTAINMENT", "timeline": "Evergreen", "depth": "Surface",
+          "recency_level": "LONG_TERM", "data_sources": "HISTORICAL", "search_strategy": "Use AI knowledge",
+          "mood_tone": "FUNNY", "notes": "Light-hearted"}, "Research about dating")
+    ]
+    builds = []
+    for query, user_profile, current_date, fields, research in requests:
+        step1_data = dict(fields, query=query, user_profile=user_profile)
+        builds.append({
+            "intent": build_intent_messages(query, user_profile, current_date),
+            "intent_research": build_intent_research_messages(query, user_profile, current_date),
+            "research": build_research_messages(step1_data),
+            "grounded_research": build_research_messages(step1_data, f"Web passages about {query}", current_date),
+            "script": build_script_messages(step1_data, research)
+        })
+
+    sizes = {}
+    for name, messages in builds[0].items():
+        prefix = messages[0]["content"].encode("utf-8")
+        other = builds[1][name][0]["content"].encode("utf-8")
+        if prefix != other:
+            raise ValueError(f"{name} system message changes between requests")
+        if b"{" in prefix.replace(b"{{", b""):
+            raise ValueError(f"{name} system message has an unfilled placeholder")
+        if messages[-1]["role"] != "user":
+            raise ValueError(f"{name} request data must come last, in a user message")
+        sizes[name] = len(prefix)
+    return sizes
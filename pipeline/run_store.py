@@ -0,0 +1,216 @@
+"""
+Run Store - Checkpoints each pipeline stage under a run id so failed runs can resume
+Every run is a directory holding step1.json, research.txt, script.txt, audio chunks and a manifest
+
+Usage:
+    python run_store.py list
+    python run_store.py rerun <run_id> --stage audio
+    python run_store.py resume <run_id>
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+STAGES = ["intent", "research", "script", "audio"]
+
+STAGE_FILES = {
+    "intent": "step1.json",
+    "research": "research.txt",
+    "script": "script.txt"
+}
+
+
+def run_key(query: str, user_profile: str = "") -> str:
+    """Runs for the same query and profile share a key, which is how retries find them"""
+    return hashlib.sha1(f"{query.strip()}\n{user_profile.strip()}".encode("utf-8")).hexdigest()[:12]
+
+
+class Run:
+    """One pipeline run's checkpoint directory"""
+
+    def __init__(self, path: str, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+
+    @property
+    def id(self) -> str:
+        return self.manifest["run_id"]
+
+    @property
+    def chunk_dir(self) -> str:
+        return os.path.join(self.path, "audio_chunks")
+
+    @property
+    def options(self) -> Dict:
+        """How the run was started (intent_mode, web_research, stream_audio); empty for older runs"""
+        return self.manifest.get("options", {})
+
+    @property
+    def complete(self) -> bool:
+        return all(stage in self.manifest["stages"] for stage in STAGES)
+
+    def first_incomplete_stage(self) -> Optional[str]:
+        for stage in STAGES:
+            if stage not in self.manifest["stages"]:
+                return stage
+        return None
+
+    def _write_manifest(self):
+        tmp_path = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, "manifest.json"))
+
+    def load(self, stage: str):
+        """Saved output of a completed stage, or None"""
+        if stage not in self.manifest["stages"]:
+            return None
+        if stage == "audio":
+            audio_filename = self.manifest["stages"]["audio"]["audio_filename"]
+            return audio_filename if os.path.exists(audio_filename) else None
+        with open(os.path.join(self.path, STAGE_FILES[stage]), encoding="utf-8") as f:
+            return json.load(f) if stage == "intent" else f.read()
+
+    def save(self, stage: str, value):
+        """Persist a stage's output and mark it complete"""
+        record = {"completed_at": time.time()}
+        if stage == "audio":
+            record["audio_filename"] = value
+        else:
+            with open(os.path.join(self.path, STAGE_FILES[stage]), "w", encoding="utf-8") as f:
+                if stage == "intent":
+                    json.dump(value, f, indent=2)
+                else:
+                    f.write(value)
+        self.manifest["stages"][stage] = record
+        self._write_manifest()
+
+    def invalidate_from(self, stage: str):
+        """Forget a stage and every stage after it so they run again"""
+        for later in STAGES[STAGES.index(stage):]:
+            self.manifest["stages"].pop(later, None)
+        # Audio is always downstream, so its chunks are synthesized afresh too
+        if os.path.isdir(self.chunk_dir):
+            shutil.rmtree(self.chunk_dir)
+        self._write_manifest()
+
+
+class RunStore:
+    """Directory of run checkpoints, one subdirectory per run id"""
+
+    def __init__(self, root: str = "runs"):
+        self.root = root
+        # Runs in progress in this process, so two live episodes never share a directory
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def _run_path(self, run_id: str) -> str:
+        return os.path.join(self.root, run_id)
+
+    def get(self, run_id: str) -> Optional[Run]:
+        manifest_path = os.path.join(self._run_path(run_id), "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, encoding="utf-8") as f:
+            return Run(self._run_path(run_id), json.load(f))
+
+    def create(self, query: str, user_profile: str = "", options: Optional[Dict] = None) -> Run:
+        run_id = f"{run_key(query, user_profile)}-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        os.makedirs(self._run_path(run_id), exist_ok=True)
+        run = Run(self._run_path(run_id), {
+            "run_id": run_id,
+            "query": query,
+            "user_profile": user_profile,
+            "options": dict(options or {}),
+            "created_at": time.time(),
+            "stages": {}
+        })
+        run._write_manifest()
+        return run
+
+    def list_runs(self) -> List[Run]:
+        """All runs, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        runs = [self.get(run_id) for run_id in os.listdir(self.root)]
+        return sorted((run for run in runs if run), key=lambda run: run.manifest["created_at"], reverse=True)
+
+    def find_resumable(self, query: str, user_profile: str = "") -> Optional[Run]:
+        """Newest unfinished run for the same query and profile"""
+        key = run_key(query, user_profile)
+        for run in self.list_runs():
+            if run.id.startswith(key + "-"):
+                return None if run.complete else run
+        return None
+
+    def open_run(self, query: str, user_profile: str = "", run_id: Optional[str] = None,
+                 resume: bool = True, options: Optional[Dict] = None) -> Run:
+        """The run to use: an explicit run id, else the newest unfinished matching run, else a new one
+
+        options are recorded in a new run's manifest; an existing run keeps its own.
+        """
+        with self._lock:
+            if run_id:
+                run = self.get(run_id)
+                if run is None:
+                    raise KeyError(f"No run with id {run_id}")
+                if run_id in self._active:
+                    raise RuntimeError(f"Run {run_id} is already in progress")
+            else:
+                run = self.find_resumable(query, user_profile) if resume else None
+                if run is None or run.id in self._active:
+                    run = self.create(query, user_profile, options)
+            self._active.add(run.id)
+            return run
+
+    def release(self, run: Run):
+        """Mark a run opened with open_run as no longer in progress"""
+        with self._lock:
+            self._active.discard(run.id)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and re-run checkpointed pipeline runs")
+    parser.add_argument("--root", default=os.getenv("PODCAST_RUNS_DIR", "runs"),
+                        help="checkpoint directory (default: PODCAST_RUNS_DIR, as the app uses)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show runs and their completed stages")
+    rerun = commands.add_parser("rerun", help="run one stage again, then any stages after it")
+    rerun.add_argument("run_id")
+    rerun.add_argument("--stage", choices=STAGES, required=True)
+    resume = commands.add_parser("resume", help="finish an unfinished run from its first incomplete stage")
+    resume.add_argument("run_id")
+    args = parser.parse_args()
+
+    store = RunStore(args.root)
+    if args.command == "list":
+        for run in store.list_runs():
+            done = ", ".join(stage for stage in STAGES if stage in run.manifest["stages"]) or "none"
+            print(f"{run.id}  {run.manifest['query']!r}  completed: {done}")
+        return
+
+    run = store.get(args.run_id)
+    if run is None:
+        print(f"No run with id {args.run_id}")
+        return
+    # The pipeline opens runs from PODCAST_RUNS_DIR, read when it is imported
+    os.environ["PODCAST_RUNS_DIR"] = args.root
+    from podcast_pipeline import run_complete_pipeline
+    # Carry on the way the run was started: same intent mode, web research and audio streaming
+    result, final_status = run_complete_pipeline(
+        run.manifest["query"], run.manifest["user_profile"], run_id=run.id,
+        rerun_stage=args.stage if args.command == "rerun" else None, **run.options
+    )
+    print(final_status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Stage Engine - Runs pipeline stages as awaitables on one background event loop
+Shares a single pooled AsyncOpenAI client between all stages and episodes
+"""
+
+import asyncio
+import os
+import threading
+import httpx
+import openai
+from dotenv import load_dotenv
+from llm_cache import LLMCache, STAGE_CACHE_TTLS, cache_key
+from telemetry import record_llm_call
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Seconds each stage may run before it is cancelled
+STAGE_TIMEOUTS = {
+    "intent": 60,
+    "research": 180,
+    "intent_research": 240,
+    "web_research": 90,
+    "script": 600,
+    "audio": 1800
+}
+
+# Connection pool shared by every concurrent LLM call
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+
+
+class StageTimeout(Exception):
+    """A stage ran past its time limit and was cancelled"""
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever in a daemon thread
+
+    Synchronous code (the Gradio handler) submits coroutines with run();
+    everything async, including the shared HTTP connection pool, lives on
+    this one loop.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="stage-engine", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """Block until the coroutine finishes; cancels it if we time out or are interrupted"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+
+_background = BackgroundLoop()
+_client = None
+_llm_cache = None
+
+
+def background_loop() -> BackgroundLoop:
+    return _background
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """Shared AsyncOpenAI client; must be used from the background loop"""
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+    return _client
+
+
+def get_llm_cache():
+    """Shared reply cache, or None when PODCAST_LLM_CACHE is set to an empty string"""
+    global _llm_cache
+    if _llm_cache is None:
+        path = os.getenv('PODCAST_LLM_CACHE', 'llm_cache.db')
+        _llm_cache = LLMCache(path) if path else False
+    return _llm_cache or None
+
+
+async def chat(messages: list, max_completion_tokens: int, temperature: float = None,
+               model: str = DEFAULT_MODEL, stage: str = None, use_cache: bool = True,
+               response_format: dict = None) -> str:
+    """One chat completion through the shared client; returns the stripped reply text
+
+    Replies for stages with a TTL in STAGE_CACHE_TTLS are cached by their
+    exact request; use_cache=False skips the lookup but still refreshes the entry.
+    response_format is passed through, e.g. to request schema-constrained JSON.
+    """
+    params = {"max_completion_tokens": max_completion_tokens}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if response_format is not None:
+        params["response_format"] = response_format
+
+    cache = get_llm_cache()
+    ttl = STAGE_CACHE_TTLS.get(stage, 0)
+    key = cache_key(model, messages, params) if cache and ttl else None
+    if key:
+        if use_cache:
+            # SQLite waits out writers for up to 30 s, so keep it off the shared loop
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                print(f"Using cached {stage} reply")
+                record_llm_call(stage, model, cached=True)
+                return cached
+        else:
+            cache.stats["bypassed"] += 1
+
+    response = await get_async_client().chat.completions.create(model=model, messages=messages, **params)
+    record_llm_call(stage, model, response.usage)
+    reply = response.choices[0].message.content.strip()
+    if key and reply:
+        await asyncio.to_thread(cache.put, key, stage, reply, ttl)
+    return reply
+
+
+async def chat_stream(messages: list, max_completion_tokens: int, temperature: float = None,
+                      model: str = DEFAULT_MODEL, stage: str = None):
+    """Stream a chat completion through the shared client, yielding text as it arrives"""
+    params = {"max_completion_tokens": max_completion_tokens}
+    if temperature is not None:
+        params["temperature"] = temperature
+    stream = await get_async_client().chat.completions.create(
+        model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+    )
+    usage = None
+    try:
+        async for event in stream:
+            # With include_usage the last event has no choices and carries the token counts
+            if event.usage:
+                usage = event.usage
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+    finally:
+        record_llm_call(stage, model, usage)
+        await stream.close()
+
+
+async def run_stage(name: str, coro, timeout: float = None):
+    """Await a stage under its time limit, raising StageTimeout instead of hanging"""
+    timeout = STAGE_TIMEOUTS.get(name) if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeout(f"{name} stage timed out after {timeout} seconds")
+
+
+def run_sync(coro, timeout: float = None):
+    """Run a coroutine on the background loop from synchronous code"""
+    return _background.run(coro, timeout)
@@ -0,0 +1,281 @@
+"""
+Telemetry - Per-run and per-stage spans, token and cost accounting, and metrics export
+Finished runs are appended to a JSON-lines trace file; metrics are served as Prometheus text
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# USD per million (prompt, completion) tokens, for cost estimates
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+
+# Histogram bucket upper bounds in seconds
+STAGE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+CHUNK_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, List]] = {}
+        self._buckets: Dict[str, tuple] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = STAGE_BUCKETS):
+        self._help[name] = ("histogram", help_text)
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        buckets = self._buckets[name]
+        with self._lock:
+            # Per-bucket counts, then sum and count
+            series = self._histograms[name].setdefault(key, [[0] * len(buckets), 0.0, 0])
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for labels, value in self._counters[name].items():
+                        lines.append(f"{name}{label_text(labels)} {value:g}")
+                    continue
+                for labels, (counts, total, count) in self._histograms[name].items():
+                    for bound, bucket_count in zip(self._buckets[name], counts):
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', f'{bound:g}')])} {bucket_count}")
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{label_text(labels)} {total:g}")
+                    lines.append(f"{name}_count{label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.histogram("podcast_run_duration_seconds", "Wall time of a whole episode")
+metrics.histogram("podcast_queue_wait_seconds", "Time an episode waited for a worker")
+metrics.histogram("podcast_stage_duration_seconds", "Wall time of each pipeline stage")
+metrics.histogram("podcast_tts_chunk_seconds", "Time to synthesize one audio chunk", CHUNK_BUCKETS)
+metrics.counter("podcast_runs_total", "Episodes finished, by status")
+metrics.counter("podcast_llm_requests_total", "Chat completions, by stage and whether the cache answered")
+metrics.counter("podcast_llm_tokens_total", "Tokens reported in the OpenAI usage field")
+metrics.counter("podcast_llm_cost_usd_total", "Estimated spend on chat completions")
+metrics.counter("podcast_tts_characters_total", "Characters sent to text to speech")
+metrics.counter("podcast_tts_chunks_total", "Audio chunks, by outcome")
+
+
+class Span:
+    """One timed stage of a run, with counters for what it spent"""
+
+    def __init__(self, name: str, started_at: float):
+        self.name = name
+        self.started_at = started_at
+        self.duration = None
+        self.status = "ok"
+        self.attributes: Dict = {}
+
+    def add(self, key: str, value: float):
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self, run_started_at: float) -> Dict:
+        return {
+            "name": self.name,
+            "offset": round(self.started_at - run_started_at, 3),
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "status": self.status,
+            **{key: round(value, 6) if isinstance(value, float) else value
+               for key, value in self.attributes.items()}
+        }
+
+
+_current_span = contextvars.ContextVar("podcast_span", default=None)
+
+
+class RunTrace:
+    """Spans for one episode, written out by finish()"""
+
+    def __init__(self, run_id: str, query: str, queue_wait: float = 0.0):
+        self.run_id = run_id
+        self.query = query
+        self.queue_wait = queue_wait
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a stage; LLM and TTS calls made inside it are charged to it"""
+        span = Span(name, time.time())
+        self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException:
+            if span.status == "ok":
+                span.status = "error"
+            raise
+        finally:
+            span.duration = time.time() - span.started_at
+            _current_span.reset(token)
+            metrics.observe("podcast_stage_duration_seconds", span.duration, stage=name, status=span.status)
+
+    def totals(self) -> Dict:
+        totals = {}
+        for span in self.spans:
+            for key in ("prompt_tokens", "completion_tokens", "cost_usd", "tts_characters", "cache_hits"):
+                if key in span.attributes:
+                    totals[key] = totals.get(key, 0) + span.attributes[key]
+        if "cost_usd" in totals:
+            totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return totals
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{span.name} {span.duration:.1f}s" for span in self.spans if span.duration is not None)
+        totals = self.totals()
+        return (f"Timings: {stages or 'none'}; queue wait {self.queue_wait:.1f}s; "
+                f"{totals.get('prompt_tokens', 0)} prompt + {totals.get('completion_tokens', 0)} completion tokens "
+                f"(${totals.get('cost_usd', 0):.4f}); {totals.get('tts_characters', 0)} TTS characters")
+
+    def finish(self, status: str) -> Dict:
+        """Close the trace, record run metrics and append it to the trace file"""
+        duration = time.time() - self.started_at
+        metrics.observe("podcast_run_duration_seconds", duration, status=status)
+        metrics.observe("podcast_queue_wait_seconds", self.queue_wait)
+        metrics.inc("podcast_runs_total", status=status)
+        record = {
+            "run_id": self.run_id,
+            "query": self.query,
+            "status": status,
+            "started_at": self.started_at,
+            "duration": round(duration, 3),
+            "queue_wait": round(self.queue_wait, 3),
+            **self.totals(),
+            "spans": [span.to_dict(self.started_at) for span in self.spans]
+        }
+        write_trace(record)
+        return record
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def record_llm_call(stage: str, model: str, usage=None, cached: bool = False):
+    """Charge one chat completion to the current span; usage is the OpenAI usage object"""
+    stage = stage or (current_span().name if current_span() else "unknown")
+    metrics.inc("podcast_llm_requests_total", stage=stage, cached=str(cached).lower())
+    span = current_span()
+    if cached:
+        if span:
+            span.add("cache_hits", 1)
+        return
+    if span:
+        span.add("llm_calls", 1)
+    if usage is None:
+        return
+    prompt_tokens = usage.prompt_tokens or 0
+    completion_tokens = usage.completion_tokens or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    metrics.inc("podcast_llm_tokens_total", prompt_tokens, stage=stage, kind="prompt")
+    metrics.inc("podcast_llm_tokens_total", completion_tokens, stage=stage, kind="completion")
+    metrics.inc("podcast_llm_cost_usd_total", cost, stage=stage)
+    if span:
+        span.add("prompt_tokens", prompt_tokens)
+        span.add("completion_tokens", completion_tokens)
+        span.add("cost_usd", cost)
+
+
+def record_tts_chunk(characters: int, seconds: float, status: str = "ok"):
+    """Charge one synthesized (or failed, or restored) audio chunk to the current span"""
+    metrics.inc("podcast_tts_chunks_total", status=status)
+    span = current_span()
+    if status == "restored":
+        if span:
+            span.add("tts_chunks_restored", 1)
+        return
+    metrics.inc("podcast_tts_characters_total", characters)
+    metrics.observe("podcast_tts_chunk_seconds", seconds, status=status)
+    if span:
+        span.add("tts_characters", characters)
+        span.attributes.setdefault("tts_chunk_seconds", []).append(round(seconds, 3))
+        if status != "ok":
+            span.add("tts_chunks_failed", 1)
+
+
+_trace_lock = threading.Lock()
+
+
+def write_trace(record: Dict):
+    """Append a finished run to PODCAST_TRACE_FILE; an empty value disables traces"""
+    path = os.getenv("PODCAST_TRACE_FILE", "traces.jsonl")
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False)
+    with _trace_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return server
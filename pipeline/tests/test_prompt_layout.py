@@ -0,0 +1,39 @@
+"""
+Prompt layout tests - every prompt's system message is a static, cacheable prefix
+Run from pipeline/ with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import layout
+from prompts.layout import check_static_prefixes
+
+
+def test_static_prefixes_are_identical_across_requests():
+    sizes = check_static_prefixes()
+    assert set(sizes) == {"intent", "intent_research", "research", "grounded_research", "script"}
+    assert all(size > 0 for size in sizes.values())
+
+
+def test_request_data_in_the_system_message_is_caught(monkeypatch):
+    real_build = layout.build_script_messages
+
+    def build_with_query_in_prefix(step1_data, research_result):
+        messages = real_build(step1_data, research_result)
+        messages[0] = dict(messages[0], content=messages[0]["content"] + step1_data["query"])
+        return messages
+
+    monkeypatch.setattr(layout, "build_script_messages", build_with_query_in_prefix)
+    with pytest.raises(ValueError, match="script system message changes between requests"):
+        check_static_prefixes()
+
+
+def test_unfilled_placeholder_is_caught(monkeypatch):
+    monkeypatch.setattr(layout, "RESEARCH_SYSTEM", layout.RESEARCH_SYSTEM + "\nQuery: {query}")
+    with pytest.raises(ValueError, match="research system message has an unfilled placeholder"):
+        check_static_prefixes()
@@ -0,0 +1,98 @@
+"""
+Web Research - Grounds the research step in a live DuckDuckGo search and crawl
+Adapter around duckduckgo_crawl's ComprehensiveResearcher for use on the stage engine's loop
+"""
+
+import asyncio
+import os
+import sys
+from typing import Optional
+
+CRAWL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "duckduckgo_crawl")
+
+# Crawl output, caches and the source archive live here
+WEB_RESEARCH_DIR = os.getenv("PODCAST_WEB_RESEARCH_DIR", "web_research")
+
+# Seconds the crawl may take before it returns whatever it has scraped
+WEB_RESEARCH_DEADLINE = 60
+
+# Size of the web passages handed to the research prompt
+GROUNDING_TOKENS = 3000
+
+_researcher = None
+_unavailable = None
+
+
+def load_crawler():
+    """Put duckduckgo_crawl on the import path; returns False if its dependencies are missing"""
+    global _unavailable
+    if _unavailable is not None:
+        return False
+    crawl_dir = os.path.normpath(CRAWL_DIR)
+    if crawl_dir not in sys.path:
+        # Appended, so pipeline modules always win a name clash
+        sys.path.append(crawl_dir)
+    try:
+        import comprehensive_research  # noqa: F401
+    except ImportError as e:
+        _unavailable = str(e)
+        print(f"Web research unavailable: {_unavailable}")
+        return False
+    return True
+
+
+def get_researcher():
+    """Shared ComprehensiveResearcher, or None when web research cannot run here
+
+    Its browsers, connections and scrape limits belong to the stage engine's
+    event loop, so it must only be used from there.
+    """
+    global _researcher
+    if _researcher is None and load_crawler():
+        from comprehensive_research import ComprehensiveResearcher
+        os.makedirs(WEB_RESEARCH_DIR, exist_ok=True)
+        _researcher = ComprehensiveResearcher(
+            cache_path=os.path.join(WEB_RESEARCH_DIR, "crawl_cache.db"),
+            search_cache_path=os.path.join(WEB_RESEARCH_DIR, "search_cache.db"),
+            archive_path=os.path.join(WEB_RESEARCH_DIR, "research_store.db"),
+            output_dir=WEB_RESEARCH_DIR
+        )
+    return _researcher
+
+
+async def research_web(query: str, deadline: float = WEB_RESEARCH_DEADLINE):
+    """Search and scrape the web for a query; returns a ResearchResult, or None if nothing usable came back
+
+    Runs on the raw query, before intent analysis has produced a search
+    strategy, and stops at the first sufficient set of sources.
+    """
+    researcher = get_researcher()
+    if researcher is None:
+        return None
+    result = await researcher.comprehensive_research(query, deadline=deadline, first_sufficient=True)
+    if result.get('error'):
+        print(f"Web research found nothing usable: {result['error']}")
+        return None
+    return result
+
+
+async def grounding_context(result, step1_data: dict, token_budget: int = GROUNDING_TOKENS) -> Optional[str]:
+    """The crawled passages most relevant to the query and the intent notes, formatted with their sources"""
+    if not load_crawler():
+        return None
+    from passages import format_passages, select_passages
+    # Scoring every crawled passage is CPU-bound, so keep it off the shared loop
+    passages = await asyncio.to_thread(select_passages, result.iter_sources, step1_data['query'],
+                                       step1_data.get('notes'), token_budget)
+    if not passages:
+        return None
+    print(f"Grounding research in {len(passages)} web passages")
+    return format_passages(step1_data['query'], passages)
+
+
+async def close_researcher():
+    """Shut down the shared researcher's browsers and connections"""
+    global _researcher
+    if _researcher is not None:
+        await _researcher.close()
+        _researcher = None